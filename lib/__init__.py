@@ -0,0 +1,18 @@
+"""
+Student Course Management
+
+Importing any module of this package loads all of the models, so string
+relationship targets such as 'Student' always resolve, and registers the ORM
+event listeners that keep derived data in step with them:
+
+- lib/analytics.py: grade summary tables
+- lib/registration.py: Course.seats_taken
+- lib/cache.py: lookup cache invalidation
+"""
+
+from lib.student import Student  # noqa: F401
+from lib.course import Course  # noqa: F401
+from lib.enrolment import Enrollment  # noqa: F401
+from lib.grade_summary import StudentGradeSummary, CourseGradeDistribution  # noqa: F401
+from lib.waitlist import WaitlistEntry  # noqa: F401
+from lib import analytics, registration, cache  # noqa: F401
@@ -0,0 +1,277 @@
+"""
+Grade Analytics
+
+Credit-weighted GPA and per-course grade distributions, kept in the summary
+tables from lib/grade_summary.py.
+
+- `recompute()` rebuilds the summaries with set-based INSERT ... SELECT
+  aggregation; use it after bulk imports, which bypass ORM events.
+- Importing this module (done by importing the `lib` package) registers ORM
+  event listeners that apply enrollment inserts, grade changes and deletes
+  to the summaries as deltas, inside the same transaction, instead of
+  rebuilding them. The mapper events only record each change; one
+  after_flush handler sums them and writes one batched upsert per summary
+  table.
+- `student_gpa()` and `course_distribution()` read the summaries by
+  primary key.
+"""
+
+from collections import defaultdict
+
+from sqlalchemy import case, delete, event, func, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from lib.db import upsert_insert
+from lib.student import Student
+from lib.course import Course
+from lib.enrolment import Enrollment
+from lib.grade_summary import StudentGradeSummary, CourseGradeDistribution
+
+# Grade points on a 4.0 scale. Grades not listed here (e.g. 'P', 'W', 'I')
+# appear in course distributions but do not count towards GPA.
+GRADE_POINTS = {
+    'A+': 4.0, 'A': 4.0, 'A-': 3.7,
+    'B+': 3.3, 'B': 3.0, 'B-': 2.7,
+    'C+': 2.3, 'C': 2.0, 'C-': 1.7,
+    'D+': 1.3, 'D': 1.0, 'D-': 0.7,
+    'F': 0.0,
+}
+
+
+def grade_points(grade):
+    """Return grade points for a grade, or None if it does not count towards GPA"""
+    if grade is None:
+        return None
+    return GRADE_POINTS.get(grade.strip().upper())
+
+
+def _points_expr():
+    return case(GRADE_POINTS, value=func.upper(func.trim(Enrollment.grade)), else_=None)
+
+
+# ---------------------------------------------------------------------------
+# Bulk recomputation
+# ---------------------------------------------------------------------------
+
+def recompute_student_summaries(conn, student_ids=None):
+    """Rebuild GPA summaries for all students, or those in `student_ids` (list or subquery)"""
+    table = StudentGradeSummary.__table__
+    credits = func.coalesce(Course.credits, 0)
+    points = _points_expr()
+    agg = (
+        select(
+            Enrollment.student_id,
+            func.sum(credits),
+            func.sum(points * credits),
+            func.count(),
+        )
+        .join(Course, Enrollment.course_id == Course.id)
+        .where(points.is_not(None))
+        .group_by(Enrollment.student_id)
+    )
+    clear = delete(table)
+    if student_ids is not None:
+        agg = agg.where(Enrollment.student_id.in_(student_ids))
+        clear = clear.where(table.c.student_id.in_(student_ids))
+    conn.execute(clear)
+    conn.execute(table.insert().from_select(
+        ['student_id', 'graded_credits', 'quality_points', 'graded_courses'], agg))
+
+
+def recompute_course_distributions(conn, course_ids=None):
+    """Rebuild grade distributions for all courses, or those in `course_ids`"""
+    table = CourseGradeDistribution.__table__
+    agg = (
+        select(Enrollment.course_id, Enrollment.grade, func.count())
+        .where(Enrollment.grade.is_not(None))
+        .group_by(Enrollment.course_id, Enrollment.grade)
+    )
+    clear = delete(table)
+    if course_ids is not None:
+        agg = agg.where(Enrollment.course_id.in_(course_ids))
+        clear = clear.where(table.c.course_id.in_(course_ids))
+    conn.execute(clear)
+    conn.execute(table.insert().from_select(['course_id', 'grade', 'count'], agg))
+
+
+def recompute(bind):
+    """Rebuild every summary table in one transaction"""
+    with bind.begin() as conn:
+        recompute_student_summaries(conn)
+        recompute_course_distributions(conn)
+
+
+# ---------------------------------------------------------------------------
+# Incremental maintenance
+# ---------------------------------------------------------------------------
+
+# Enrollment changes recorded by the mapper events during the current flush,
+# applied together by the session's after_flush handler
+_PENDING_ENROLLMENTS = '_grade_summary_enrollments'
+_PENDING_REWEIGHTED = '_grade_summary_reweighted_courses'
+
+def _upsert_deltas(conn, table, rows, key, columns):
+    """Add each row's `columns` to the existing summary row, inserting it if missing"""
+    # One statement for all rows (executemany), so it compiles once and is
+    # cached; rows arrive sorted by key so concurrent flushes lock in one order
+    stmt = upsert_insert(conn)(table)
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=key,
+        set_={col: table.c[col] + stmt.excluded[col] for col in columns},
+    ), rows)
+
+
+def _course_credits(session, conn, course_ids):
+    """Return {course_id: credits}, preferring courses loaded in the session"""
+    credits, missing = {}, []
+    for course_id in course_ids:
+        course = session.identity_map.get(session.identity_key(Course, course_id))
+        if course is not None and 'credits' in inspect(course).dict:
+            # Also covers courses deleted in this flush, which are gone from the table
+            credits[course_id] = course.credits
+        else:
+            missing.append(course_id)
+    if missing:
+        credits.update(conn.execute(
+            select(Course.id, Course.credits).where(Course.id.in_(missing))).tuples().all())
+    return credits
+
+
+def apply_enrollment_changes(session, changes, reweighted_courses=()):
+    """
+    Apply enrollment (student_id, course_id, grade, sign) changes to the summaries
+
+    `sign` is 1 for an added and -1 for a removed enrollment. Deltas are summed
+    per summary row and written with one executemany upsert per table; course
+    credits are read once per course. Students of `reweighted_courses` (whose
+    credits changed) are recomputed from their enrollments instead.
+    """
+    deleted = session.deleted
+    deleted_students = {obj.id for obj in deleted if isinstance(obj, Student)}
+    deleted_courses = {obj.id for obj in deleted if isinstance(obj, Course)}
+    conn = session.connection()
+
+    dist_deltas = defaultdict(int)
+    graded = []
+    for student_id, course_id, grade, sign in changes:
+        if grade is None:
+            continue
+        # Summary rows of deleted students and courses go with them (ON DELETE CASCADE)
+        if course_id not in deleted_courses:
+            dist_deltas[course_id, grade] += sign
+        points = grade_points(grade)
+        if points is not None and student_id not in deleted_students:
+            graded.append((student_id, course_id, points, sign))
+
+    credits = _course_credits(session, conn, {course_id for _, course_id, _, _ in graded})
+    summary_deltas = defaultdict(lambda: [0, 0.0, 0])
+    for student_id, course_id, points, sign in graded:
+        course_credits = credits.get(course_id) or 0
+        delta = summary_deltas[student_id]
+        delta[0] += sign * course_credits
+        delta[1] += sign * course_credits * points
+        delta[2] += sign
+
+    dist = CourseGradeDistribution.__table__
+    rows = [{'course_id': course_id, 'grade': grade, 'count': count}
+            for (course_id, grade), count in sorted(dist_deltas.items()) if count]
+    if rows:
+        _upsert_deltas(conn, dist, rows, ['course_id', 'grade'], ['count'])
+        conn.execute(delete(dist).where(
+            dist.c.course_id.in_({row['course_id'] for row in rows}), dist.c.count <= 0))
+
+    rows = [{'student_id': student_id, 'graded_credits': delta[0],
+             'quality_points': delta[1], 'graded_courses': delta[2]}
+            for student_id, delta in sorted(summary_deltas.items()) if any(delta)]
+    if rows:
+        _upsert_deltas(conn, StudentGradeSummary.__table__, rows, ['student_id'],
+                       ['graded_credits', 'quality_points', 'graded_courses'])
+
+    # A credits change re-weights every GPA that includes the course
+    reweighted = [course_id for course_id in reweighted_courses if course_id not in deleted_courses]
+    if reweighted:
+        students = select(Enrollment.student_id).where(Enrollment.course_id.in_(reweighted))
+        recompute_student_summaries(conn, students)
+
+
+def _load_old_value(target, value, oldvalue, initiator):
+    pass
+
+
+# active_history makes the ORM load the previous value of an expired attribute
+# before it is overwritten, so after_update can subtract the old contribution
+for _attr in (Enrollment.student_id, Enrollment.course_id, Enrollment.grade):
+    event.listen(_attr, 'set', _load_old_value, active_history=True)
+
+
+def _old_value(target, attr):
+    history = inspect(target).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, attr)
+
+
+def _record(target, *changes):
+    pending = object_session(target).info.setdefault(_PENDING_ENROLLMENTS, [])
+    pending.extend(changes)
+
+
+# The mapper events only record what changed; the SQL runs once per flush
+@event.listens_for(Enrollment, 'after_insert')
+def _enrollment_inserted(mapper, conn, target):
+    _record(target, (target.student_id, target.course_id, target.grade, 1))
+
+
+@event.listens_for(Enrollment, 'after_update')
+def _enrollment_updated(mapper, conn, target):
+    old = tuple(_old_value(target, attr) for attr in ('student_id', 'course_id', 'grade'))
+    new = (target.student_id, target.course_id, target.grade)
+    if old != new:
+        _record(target, (*old, -1), (*new, 1))
+
+
+@event.listens_for(Enrollment, 'after_delete')
+def _enrollment_deleted(mapper, conn, target):
+    old = tuple(_old_value(target, attr) for attr in ('student_id', 'course_id', 'grade'))
+    _record(target, (*old, -1))
+
+
+@event.listens_for(Course, 'after_update')
+def _course_updated(mapper, conn, target):
+    if inspect(target).attrs.credits.history.has_changes():
+        object_session(target).info.setdefault(_PENDING_REWEIGHTED, set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_flushed(session, flush_context):
+    changes = session.info.pop(_PENDING_ENROLLMENTS, ())
+    reweighted = session.info.pop(_PENDING_REWEIGHTED, ())
+    if changes or reweighted:
+        apply_enrollment_changes(session, changes, reweighted)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back(session):
+    # A failed flush never reaches after_flush
+    session.info.pop(_PENDING_ENROLLMENTS, None)
+    session.info.pop(_PENDING_REWEIGHTED, None)
+
+
+# ---------------------------------------------------------------------------
+# Dashboard reads
+# ---------------------------------------------------------------------------
+
+def student_gpa(session, student_id):
+    """Return the student's grade summary as a dict (primary key lookup)"""
+    summary = session.get(StudentGradeSummary, student_id, populate_existing=True)
+    if summary is None:
+        return StudentGradeSummary(student_id=student_id, graded_credits=0,
+                                   quality_points=0.0, graded_courses=0).to_dict()
+    return summary.to_dict()
+
+
+def course_distribution(session, course_id):
+    """Return {grade: count} for a course (primary key range lookup)"""
+    stmt = select(CourseGradeDistribution.grade, CourseGradeDistribution.count).where(
+        CourseGradeDistribution.course_id == course_id)
+    return dict(session.execute(stmt).tuples().all())
@@ -0,0 +1,172 @@
+"""
+Data Layer Benchmarks
+
+Times the core operations of the Student/Course/Enrollment models against a
+synthetic dataset (lib/synthetic.py) and reports latency percentiles and
+throughput as JSON, so results can be diffed between versions. By default it
+runs on `lib.db.scratch_engine()`.
+
+    python -m lib.cli benchmark --students 5000 --output bench.json
+"""
+
+import json
+import platform
+import random
+import time
+from datetime import datetime, timezone
+
+import sqlalchemy
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from lib.db import scratch_engine
+from lib.schema import upgrade
+from lib.student import Student
+from lib.course import Course
+from lib.enrolment import Enrollment
+from lib.synthetic import SyntheticDataset
+from lib import reports
+
+RESULT_VERSION = 1
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, -(-len(sorted_samples) * pct // 100))
+    return sorted_samples[int(rank) - 1]
+
+
+class OperationTimer:
+    """
+    Latency samples for one benchmarked operation
+
+    Attributes:
+        name (str): Operation name
+        samples (list): Seconds taken by each call
+        items (int): Rows processed across all calls (for throughput)
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.samples = []
+        self.items = 0
+
+    def time(self, fn, items=1):
+        """Call `fn` and record its latency; items=None counts len() of the result"""
+        start = time.perf_counter()
+        result = fn()
+        self.samples.append(time.perf_counter() - start)
+        self.items += len(result) if items is None else items
+        return result
+
+    def to_dict(self):
+        """Summarize samples as milliseconds percentiles and items/sec"""
+        ordered = sorted(self.samples)
+        total = sum(ordered)
+        ms = 1000.0
+        return {
+            'calls': len(ordered),
+            'items': self.items,
+            'total_s': total,
+            'mean_ms': total / len(ordered) * ms if ordered else 0.0,
+            'p50_ms': percentile(ordered, 50) * ms,
+            'p90_ms': percentile(ordered, 90) * ms,
+            'p95_ms': percentile(ordered, 95) * ms,
+            'p99_ms': percentile(ordered, 99) * ms,
+            'max_ms': ordered[-1] * ms if ordered else 0.0,
+            'items_per_sec': self.items / total if total else 0.0,
+        }
+
+
+def _insert_batches(engine, timer, model, rows, batch_size):
+    with Session(engine) as session:
+        batch = []
+        for row in rows:
+            batch.append(model(**row))
+            if len(batch) == batch_size:
+                timer.time(lambda: (session.add_all(batch), session.commit()), len(batch))
+                batch = []
+        if batch:
+            timer.time(lambda: (session.add_all(batch), session.commit()), len(batch))
+
+
+def run(database_url=None, dataset=None, batch_size=500, samples=200, seed=7):
+    """Populate a fresh database from `dataset`, time each operation and return a report dict"""
+    dataset = dataset or SyntheticDataset()
+    timers = {}
+
+    def timer(name):
+        return timers.setdefault(name, OperationTimer(name))
+
+    with scratch_engine(database_url) as engine:
+        upgrade(engine)
+        rng = random.Random(seed)
+
+        _insert_batches(engine, timer('insert_students'), Student, dataset.student_rows(), batch_size)
+        _insert_batches(engine, timer('insert_courses'), Course, dataset.course_rows(), batch_size)
+        with Session(engine) as session:
+            student_ids = dict(session.execute(select(Student.email, Student.id)).tuples().all())
+            course_ids = dict(session.execute(select(Course.code, Course.id)).tuples().all())
+        enrollment_rows = (
+            {'student_id': student_ids[dataset.student_email(s)],
+             'course_id': course_ids[dataset.course_code(c)],
+             'grade': grade}
+            for s, c, grade in dataset.enrollment_pairs())
+        _insert_batches(engine, timer('insert_enrollments'), Enrollment, enrollment_rows, batch_size)
+
+        emails = rng.sample(sorted(student_ids), min(samples, len(student_ids)))
+        codes = rng.sample(sorted(course_ids), min(samples, len(course_ids)))
+
+        with Session(engine) as session:
+            t = timer('lookup_student_by_email')
+            for email in emails:
+                t.time(lambda: session.scalars(select(Student).where(Student.email == email)).one())
+            t = timer('lookup_course_by_code')
+            for code in codes:
+                t.time(lambda: session.scalars(select(Course).where(Course.code == code)).one())
+
+        with Session(engine) as session:
+            t = timer('roster_fetch')
+            for code in codes:
+                t.time(lambda: list(reports.course_roster(session, course_ids[code])), None)
+            t = timer('transcript_fetch')
+            for email in emails:
+                t.time(lambda: list(reports.student_transcript(session, student_ids[email])), None)
+
+        # to_dict over a course's enrollments: lazy relationships (N+1) vs eager
+        # loading. The query is timed too, since that is where selectinload's
+        # extra SELECTs run.
+        for name, options in (('to_dict_lazy', ()),
+                              ('to_dict_eager', (selectinload(Enrollment.student),
+                                                 selectinload(Enrollment.course)))):
+            t = timer(name)
+            for code in codes:
+                with Session(engine) as session:
+                    stmt = select(Enrollment).where(Enrollment.course_id == course_ids[code]).options(*options)
+                    t.time(lambda: [e.to_dict() for e in session.scalars(stmt).all()], None)
+
+        t = timer('delete_student_cascade')
+        with Session(engine) as session:
+            for email in emails[:max(1, len(emails) // 2)]:
+                student = session.get(Student, student_ids[email])
+                t.time(lambda: (session.delete(student), session.commit()),
+                       1 + dataset.enrollments_per_student)
+
+        return {
+            'version': RESULT_VERSION,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'backend': engine.dialect.name,
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'dataset': dataset.to_dict(),
+            'batch_size': batch_size,
+            'operations': {name: t.to_dict() for name, t in timers.items()},
+        }
+
+
+def write_report(report, path):
+    """Write a benchmark report as JSON"""
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2)
@@ -0,0 +1,216 @@
+"""
+Lookup Cache
+
+Read-through cache for resolving a Course by code and a Student by email or
+id. Entries are detached plain dicts in the `to_dict()` shape, never
+session-bound ORM objects, so they are safe to share across sessions and
+threads.
+
+The cache is bounded (LRU eviction at `maxsize` entries) and every entry
+expires after `ttl` seconds. ORM `after_insert`/`after_update`/`after_delete`
+events on Student and Course invalidate every entry for the affected row at
+flush time, and again when the session commits: between the flush and the
+commit another session can still read the old committed row and cache it.
+A row the reading session has modified but not committed is returned
+uncached, so a later rollback never leaves its edits in the shared cache.
+A read that an invalidation overtakes (SELECT, then another session commits
+and invalidates, then the stale row would be cached) is not cached either:
+`set()` compares the tag's last invalidation with a generation taken before
+the SELECT.
+Core-level bulk writes (lib/importer.py) bypass those events and clear the
+cache instead.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from lib.student import Student
+from lib.course import Course
+
+DEFAULT_MAXSIZE = 10000
+DEFAULT_TTL = 300.0
+
+
+class LookupCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and tag-based invalidation
+
+    Each entry is tagged with the (model, id) of the row it came from, so all
+    keys that resolve to a row (e.g. its id and its email) can be dropped
+    together when that row changes.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, tag, value)
+        self._tags = {}  # tag -> set of keys
+        # Invalidation sequence: tag -> generation of its last invalidation,
+        # oldest first, trimmed to maxsize; `_floor` covers the trimmed ones
+        self._generation = 0
+        self._invalidated = OrderedDict()
+        self._floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value for `key`, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[2])
+
+    def generation(self):
+        """Return a snapshot to pass to set() for a value about to be loaded"""
+        with self._lock:
+            return self._generation
+
+    def set(self, key, tag, value, generation=None):
+        """
+        Cache `value` under `key`, tagged with `tag`
+
+        With a `generation` from generation() taken before the value was
+        loaded, the write is skipped if `tag` was invalidated since, as the
+        value may predate that change.
+        """
+        with self._lock:
+            if generation is not None and (
+                    generation < self._floor or self._invalidated.get(tag, -1) > generation):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self._clock() + self.ttl, tag, dict(value))
+            self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, tag):
+        """Drop every entry tagged with `tag`"""
+        with self._lock:
+            keys = self._tags.pop(tag, ())
+            for key in keys:
+                self._entries.pop(key, None)
+            self.invalidations += len(keys)
+            self._generation += 1
+            self._invalidated.pop(tag, None)
+            self._invalidated[tag] = self._generation
+            if len(self._invalidated) > self.maxsize:
+                _tag, self._floor = self._invalidated.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            # Loads already in flight may predate whatever prompted the clear
+            self._generation += 1
+            self._invalidated.clear()
+            self._floor = self._generation
+
+    def _remove(self, key):
+        _expires, tag, _value = self._entries.pop(key)
+        keys = self._tags.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+
+    def stats(self):
+        """Return hit/miss counters and the current size as a dict"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+
+# Shared cache used by the lookup helpers below
+lookup_cache = LookupCache()
+
+# session.info key holding the tags a session has written since its last commit
+_PENDING_TAGS = '_lookup_cache_tags'
+
+
+def _read_through(session, key, model, where, cache):
+    cache = lookup_cache if cache is None else cache
+    value = cache.get(key)
+    if value is not None:
+        return value
+    # Taken before the SELECT: a commit landing between it and set() wins
+    generation = cache.generation()
+    obj = session.scalars(select(model).where(where)).first()
+    if obj is None:
+        # Misses are not cached: an insert has no cached entry to invalidate
+        return None
+    value = obj.to_dict()
+    tag = (model.__tablename__, obj.id)
+    # Don't share this session's own unflushed or uncommitted edits with others
+    if session.is_modified(obj) or tag in session.info.get(_PENDING_TAGS, ()):
+        return value
+    cache.set(key, tag, value, generation)
+    return value
+
+
+def get_course_by_code(session, code, cache=None):
+    """Return the course with `code` as a dict, or None"""
+    return _read_through(session, ('course_code', code), Course, Course.code == code, cache)
+
+
+def get_student_by_email(session, email, cache=None):
+    """Return the student with `email` as a dict, or None"""
+    return _read_through(session, ('student_email', email), Student, Student.email == email, cache)
+
+
+def get_student(session, student_id, cache=None):
+    """Return the student with primary key `student_id` as a dict, or None"""
+    return _read_through(session, ('student_id', student_id), Student, Student.id == student_id, cache)
+
+
+def _invalidate(mapper, connection, target):
+    tag = (target.__tablename__, target.id)
+    lookup_cache.invalidate(tag)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_TAGS, set()).add(tag)
+
+
+for _model in (Student, Course):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _invalidate)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    # Drop anything other sessions cached from the pre-commit row since the flush
+    for tag in session.info.pop(_PENDING_TAGS, ()):
+        lookup_cache.invalidate(tag)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back(session):
+    session.info.pop(_PENDING_TAGS, None)
@@ -0,0 +1,193 @@
+"""
+Command Line Interface
+
+Usage:
+    python -m lib.cli import students students.csv
+    python -m lib.cli import enrollments enrollments.jsonl --batch-size 5000
+    python -m lib.cli report roster --course CS101 roster.csv
+    python -m lib.cli migrate
+    python -m lib.cli check-plans
+    python -m lib.cli recompute-analytics
+    python -m lib.cli load-test --threads 16 --students 2000
+    python -m lib.cli benchmark --students 5000 --output bench.json
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import select
+
+from lib import importer, reports, schema, explain, analytics, loadtest, benchmark
+from lib.db import SessionLocal, engine
+from lib.student import Student
+from lib.course import Course
+from lib.synthetic import SyntheticDataset
+
+
+def cmd_import(args):
+    """Bulk import a CSV/JSON Lines file and report throughput"""
+    stats = importer.IMPORTERS[args.kind](args.path, batch_size=args.batch_size)
+    print(f"Imported {stats.rows} {stats.kind} in {stats.batches} batches "
+          f"({stats.skipped} skipped) in {stats.elapsed:.2f}s "
+          f"- {stats.rows_per_sec:.0f} rows/sec")
+    if stats.over_capacity:
+        print(f"Warning: {len(stats.over_capacity)} courses over capacity: "
+              f"{', '.join(stats.over_capacity)}")
+    return 0
+
+
+def cmd_report(args):
+    """Stream a roster, transcript or full enrollment dump to a file"""
+    writer = reports.write_csv if args.path.lower().endswith('.csv') else reports.write_jsonl
+    db = SessionLocal()
+    try:
+        if args.report == 'roster':
+            if not args.course:
+                raise SystemExit('roster requires --course')
+            course_id = db.scalar(select(Course.id).where(Course.code == args.course))
+            if course_id is None:
+                raise SystemExit(f"Course '{args.course}' not found")
+            rows = reports.course_roster(db, course_id)
+        elif args.report == 'transcript':
+            if not args.student:
+                raise SystemExit('transcript requires --student')
+            student_id = db.scalar(select(Student.id).where(Student.email == args.student))
+            if student_id is None:
+                raise SystemExit(f"Student '{args.student}' not found")
+            rows = reports.student_transcript(db, student_id)
+        else:
+            rows = reports.enrollment_dump(db)
+        count = writer(rows, args.path)
+    finally:
+        db.close()
+    print(f"Wrote {count} rows to {args.path}")
+    return 0
+
+
+def cmd_migrate(args):
+    """Create missing tables and indexes on the configured database"""
+    created = schema.upgrade(engine)
+    print(f"Added: {', '.join(created)}" if created else "Schema is up to date")
+    return 0
+
+
+def cmd_check_plans(args):
+    """Fail if any core query plan falls back to a full table scan"""
+    plans = explain.capture_plans(engine)
+    failed = 0
+    for name, result in plans.items():
+        if result['full_scans']:
+            failed += 1
+            print(f"FAIL {name}: full scan on {', '.join(result['full_scans'])}")
+        else:
+            print(f"ok   {name}")
+        if args.verbose:
+            print(f"     {result['plan']}")
+    return 1 if failed else 0
+
+
+def cmd_recompute_analytics(args):
+    """Rebuild the GPA and grade distribution summary tables"""
+    analytics.recompute(engine)
+    print("Grade summaries rebuilt")
+    return 0
+
+
+def cmd_load_test(args):
+    """Run the concurrent registration load test and check seat invariants"""
+    report = loadtest.run(
+        database_url=args.database_url, threads=args.threads, students=args.students,
+        courses=args.courses, capacity=args.capacity,
+        requests_per_student=args.requests_per_student, batch_size=args.batch_size,
+        waitlist=not args.no_waitlist, drop_ratio=args.drop_ratio)
+    print(f"{report['requests']} requests on {report['backend']} with {report['threads']} threads "
+          f"in {report['elapsed']:.2f}s - {report['requests_per_sec']:.0f} requests/sec, "
+          f"{report['enrollments_per_sec']:.0f} enrollments/sec")
+    print(f"Outcomes: {report['outcomes']}, {report['drops']} drops, "
+          f"{report['promoted']} promoted from waitlists")
+    for error in report['errors']:
+        print(f"FAIL {error}")
+    return 1 if report['errors'] else 0
+
+
+def cmd_benchmark(args):
+    """Benchmark the data layer on a synthetic dataset and write JSON results"""
+    dataset = SyntheticDataset(students=args.students, courses=args.courses,
+                               enrollments_per_student=args.enrollments_per_student, seed=args.seed)
+    report = benchmark.run(database_url=args.database_url, dataset=dataset,
+                           batch_size=args.batch_size, samples=args.samples)
+    print(f"{'operation':<26}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'items/sec':>12}")
+    for name, op in report['operations'].items():
+        print(f"{name:<26}{op['calls']:>7}{op['p50_ms']:>10.2f}{op['p95_ms']:>10.2f}"
+              f"{op['p99_ms']:>10.2f}{op['items_per_sec']:>12.0f}")
+    if args.output:
+        benchmark.write_report(report, args.output)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+def _add_scratch_url_argument(parser):
+    parser.add_argument('--database-url', help='Scratch database URL (default: temporary SQLite file)')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='lib.cli', description='Student and course management')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    p_import = subparsers.add_parser('import', help='Bulk import students, courses or enrollments')
+    p_import.add_argument('kind', choices=sorted(importer.IMPORTERS))
+    p_import.add_argument('path', help='CSV or JSON Lines (.jsonl) file')
+    p_import.add_argument('--batch-size', type=int, default=importer.DEFAULT_BATCH_SIZE)
+    p_import.set_defaults(func=cmd_import)
+
+    p_report = subparsers.add_parser('report', help='Write a roster, transcript or enrollment dump')
+    p_report.add_argument('report', choices=['roster', 'transcript', 'enrollments'])
+    p_report.add_argument('path', help='Output file (.csv for CSV, otherwise JSON Lines)')
+    p_report.add_argument('--course', help='Course code (roster)')
+    p_report.add_argument('--student', help='Student email (transcript)')
+    p_report.set_defaults(func=cmd_report)
+
+    p_migrate = subparsers.add_parser('migrate', help='Create missing tables and indexes')
+    p_migrate.set_defaults(func=cmd_migrate)
+
+    p_plans = subparsers.add_parser('check-plans', help='Check core query plans for full scans')
+    p_plans.add_argument('-v', '--verbose', action='store_true', help='Print the captured plans')
+    p_plans.set_defaults(func=cmd_check_plans)
+
+    p_analytics = subparsers.add_parser('recompute-analytics', help='Rebuild grade summary tables')
+    p_analytics.set_defaults(func=cmd_recompute_analytics)
+
+    p_load = subparsers.add_parser('load-test', help='Concurrent registration load test')
+    _add_scratch_url_argument(p_load)
+    p_load.add_argument('--threads', type=int, default=16)
+    p_load.add_argument('--students', type=int, default=2000)
+    p_load.add_argument('--courses', type=int, default=5)
+    p_load.add_argument('--capacity', type=int, default=100)
+    p_load.add_argument('--requests-per-student', type=int, default=2)
+    p_load.add_argument('--batch-size', type=int, default=0, help='Students per enroll_many call (0 = single enrolls)')
+    p_load.add_argument('--no-waitlist', action='store_true')
+    p_load.add_argument('--drop-ratio', type=float, default=0.1,
+                        help='Share of enroll requests that also get a drop request')
+    p_load.set_defaults(func=cmd_load_test)
+
+    p_bench = subparsers.add_parser('benchmark', help='Benchmark the data layer on synthetic data')
+    _add_scratch_url_argument(p_bench)
+    p_bench.add_argument('--students', type=int, default=1000)
+    p_bench.add_argument('--courses', type=int, default=50)
+    p_bench.add_argument('--enrollments-per-student', type=int, default=5)
+    p_bench.add_argument('--seed', type=int, default=42)
+    p_bench.add_argument('--batch-size', type=int, default=500)
+    p_bench.add_argument('--samples', type=int, default=200, help='Lookups/fetches per read operation')
+    p_bench.add_argument('--output', help='Write JSON results to this file')
+    p_bench.set_defaults(func=cmd_benchmark)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,16 +20,22 @@ class Course(Base):
         name (str): Course name (required)
         description (str): Detailed course description
         credits (int): Number of credits for the course
+        capacity (int): Maximum number of enrolled students (None for unlimited)
+        seats_taken (int): Seats currently taken, maintained by lib/registration.py
         created_at (datetime): Timestamp when course record was created
         enrollments (relationship): Relationship to Enrollment model
     """
     __tablename__ = 'courses'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    code = Column(String(20), unique=True, nullable=False)
+    # "C" collation on PostgreSQL for the prefix search, as on Student.last_name
+    code = Column(String(20).with_variant(String(20, collation='C'), 'postgresql'),
+                  unique=True, nullable=False)
     name = Column(String(200), nullable=False)
     description = Column(Text)
     credits = Column(Integer, default=3)
+    capacity = Column(Integer)
+    seats_taken = Column(Integer, nullable=False, default=0, server_default='0')
     created_at = Column(DateTime, server_default=func.now())
 
     # Relationship to enrollments (one course can have many enrollments)
@@ -46,5 +52,6 @@ class Course(Base):
             'name': self.name,
             'description': self.description,
             'credits': self.credits,
+            'capacity': self.capacity,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
\ No newline at end of file
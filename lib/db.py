@@ -1,20 +1,333 @@
 # lib/db.py
-from sqlalchemy import create_engine
+"""
+Database Engine and Sessions
+
+The engine is configured from environment variables, optionally layered over
+an INI file (section [database]) named by DB_CONFIG_FILE. Environment
+variables always win over the file.
+
+    DATABASE_URL          Full SQLAlchemy URL; overrides the DB_* parts below
+    DB_BACKEND            'postgresql' (default) or 'sqlite'
+    DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
+                          PostgreSQL connection parts; for sqlite DB_NAME is
+                          the database file (or ':memory:')
+    DB_ECHO               Log every SQL statement (default off)
+    DB_POOL_SIZE          Persistent connections kept in the pool (default 5)
+    DB_MAX_OVERFLOW       Extra connections allowed above pool size (default 10)
+    DB_POOL_TIMEOUT       Seconds to wait for a free connection (default 30);
+                          for sqlite also how long to wait for the database lock
+    DB_POOL_RECYCLE       Recycle connections older than N seconds (default 1800)
+    DB_POOL_PRE_PING      Test connections on checkout (default on)
+    DB_STATEMENT_TIMEOUT  PostgreSQL statement_timeout in milliseconds (default off)
+    DB_INSTRUMENT         Attach lib/instrumentation.py timing (default off)
+    DB_SLOW_QUERY_MS      Slow-query log threshold in milliseconds (default 100)
+    DB_INSTRUMENT_DUMP    Write the instrumentation report to this file on exit;
+                          the async engine's report goes next to it with
+                          '.async' before the extension
+    DB_ASYNC_URL          URL for the async engine; by default the URL above
+                          with its driver swapped for asyncpg or aiosqlite
+"""
+
+import configparser
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from lib.instrumentation import instrument
+
+DEFAULTS = {
+    'url': None,
+    'backend': 'postgresql',
+    'user': 'milton',
+    'password': '',
+    'host': 'localhost',
+    'port': '5432',
+    'name': 'student_course_management',
+    'echo': 'false',
+    'pool_size': '5',
+    'max_overflow': '10',
+    'pool_timeout': '30',
+    'pool_recycle': '1800',
+    'pool_pre_ping': 'true',
+    'statement_timeout': None,
+    'instrument': 'false',
+    'slow_query_ms': '100',
+    'instrument_dump': None,
+    'async_url': None,
+}
+
+_ENV_NAMES = {'url': 'DATABASE_URL'}
+
+# Async drivers used when deriving the async URL from the sync one
+_ASYNC_DRIVERS = {'postgresql': 'asyncpg', 'sqlite': 'aiosqlite'}
+
+
+def _as_bool(value):
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def load_settings(config_file=None, environ=None):
+    """Merge defaults, the optional INI file and environment variables"""
+    environ = os.environ if environ is None else environ
+    settings = dict(DEFAULTS)
+
+    config_file = config_file or environ.get('DB_CONFIG_FILE')
+    if config_file:
+        parser = configparser.ConfigParser()
+        if not parser.read(config_file):
+            raise FileNotFoundError(f"Database config file '{config_file}' not found")
+        if parser.has_section('database'):
+            for key, value in parser.items('database'):
+                if key in settings:
+                    settings[key] = value
+
+    for key in settings:
+        env_name = _ENV_NAMES.get(key, f"DB_{key.upper()}")
+        if env_name in environ:
+            settings[key] = environ[env_name]
+    return settings
+
+
+def build_url(settings):
+    """Build the database URL from settings"""
+    if settings['url']:
+        return make_url(settings['url'])
+    if settings['backend'] == 'sqlite':
+        return URL.create('sqlite', database=settings['name'])
+    if settings['backend'] != 'postgresql':
+        raise ValueError(f"Unsupported DB_BACKEND '{settings['backend']}'")
+    # URL.create escapes credentials containing '@', ':', '/' and the like
+    return URL.create(
+        'postgresql+psycopg2',
+        username=settings['user'],
+        password=settings['password'] or None,
+        host=settings['host'],
+        port=int(settings['port']) if settings['port'] else None,
+        database=settings['name'],
+    )
+
+
+def build_async_url(settings):
+    """Build the async engine URL from settings"""
+    if settings['async_url']:
+        return make_url(settings['async_url'])
+    url = build_url(settings)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for the '{backend}' backend; set DB_ASYNC_URL")
+    return url.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}")
+
+
+class PoolMetrics:
+    """
+    Live connection pool metrics
+
+    Attributes:
+        checkouts (int): Total successful connection checkouts
+        timeouts (int): Checkouts that gave up after pool_timeout
+        wait_total (float): Total seconds spent waiting for a connection
+        wait_max (float): Longest single wait for a connection, in seconds
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def snapshot(self, pool):
+        """Return the counters plus the pool's current occupancy as a dict"""
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            data = {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_total': self.wait_total,
+                'wait_avg': self.wait_total / attempts if attempts else 0.0,
+                'wait_max': self.wait_max,
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                'pool_size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow(),
+            })
+        return data
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def __init__(self, *args, metrics=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics if metrics is not None else PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
 
-#PostgreSQL credentials
-DB_USER = "milton"
-DB_PASSWORD = "Thanks50:14"
-DB_HOST = "localhost"
-DB_PORT = "5432"
-DB_NAME = "student_course_management"
 
+def create_db_engine(settings=None):
+    """Create an engine from settings (loaded from the environment by default)"""
+    settings = load_settings() if settings is None else settings
+    url = build_url(settings)
+    kwargs = {'echo': _as_bool(settings['echo'])}
+
+    if url.get_backend_name() == 'sqlite':
+        # SQLite has one write lock; wait for it as long as for a pool connection
+        kwargs['connect_args'] = {'check_same_thread': False,
+                                  'timeout': float(settings['pool_timeout'])}
+        if url.database in (None, '', ':memory:'):
+            # One shared connection, otherwise every checkout sees an empty database
+            kwargs['poolclass'] = StaticPool
+            return _configure(create_engine(url, **kwargs), settings)
+
+    kwargs.update({
+        'poolclass': TimedQueuePool,
+        'pool_size': int(settings['pool_size']),
+        'max_overflow': int(settings['max_overflow']),
+        'pool_timeout': float(settings['pool_timeout']),
+        'pool_recycle': int(settings['pool_recycle']),
+        'pool_pre_ping': _as_bool(settings['pool_pre_ping']),
+    })
+    if url.get_backend_name() == 'postgresql' and settings['statement_timeout']:
+        kwargs['connect_args'] = {
+            'options': f"-c statement_timeout={int(settings['statement_timeout'])}",
+        }
+    return _configure(create_engine(url, **kwargs), settings)
+
+
+def create_async_db_engine(settings=None):
+    """Create an AsyncEngine from settings (loaded from the environment by default)"""
+    settings = load_settings() if settings is None else settings
+    url = build_async_url(settings)
+    kwargs = {'echo': _as_bool(settings['echo'])}
+
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            kwargs['poolclass'] = StaticPool
+            async_engine = create_async_engine(url, **kwargs)
+            _configure(async_engine.sync_engine, settings, dump_suffix='.async')
+            return async_engine
+
+    kwargs.update({
+        'pool_size': int(settings['pool_size']),
+        'max_overflow': int(settings['max_overflow']),
+        'pool_timeout': float(settings['pool_timeout']),
+        'pool_recycle': int(settings['pool_recycle']),
+        'pool_pre_ping': _as_bool(settings['pool_pre_ping']),
+    })
+    if url.get_backend_name() == 'postgresql' and settings['statement_timeout']:
+        kwargs['connect_args'] = {
+            'server_settings': {'statement_timeout': str(int(settings['statement_timeout']))},
+        }
+    async_engine = create_async_engine(url, **kwargs)
+    _configure(async_engine.sync_engine, settings, dump_suffix='.async')
+    return async_engine
+
+
+def _configure(engine, settings, dump_suffix=''):
+    if _as_bool(settings['instrument']):
+        inst = instrument(engine, slow_threshold=float(settings['slow_query_ms']) / 1000)
+        if settings['instrument_dump']:
+            # Each engine writes its own report rather than overwriting another's
+            root, ext = os.path.splitext(settings['instrument_dump'])
+            inst.dump_on_exit(f"{root}{dump_suffix}{ext}")
+    if engine.dialect.name == 'sqlite':
+        @event.listens_for(engine, 'connect')
+        def _sqlite_pragmas(dbapi_conn, _record):
+            # SQLite ignores ON DELETE CASCADE unless foreign keys are enabled
+            cursor = dbapi_conn.cursor()
+            cursor.execute('PRAGMA foreign_keys=ON')
+            cursor.close()
+    return engine
+
+
+@contextmanager
+def scratch_engine(database_url=None, **settings):
+    """
+    Yield an engine on a throwaway database; disposed (and deleted) on exit
+
+    Without `database_url` the database is a SQLite file in a new temporary
+    directory; pass a URL to use a scratch PostgreSQL database instead. Extra
+    keyword arguments override engine settings, e.g. pool_size='16'.
+    """
+    tmpdir = None
+    if database_url is None:
+        tmpdir = tempfile.mkdtemp(prefix='scratch-db-')
+        database_url = f"sqlite:///{os.path.join(tmpdir, 'scratch.db')}"
+    engine = create_db_engine({**DEFAULTS, 'url': database_url, **settings})
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+        if tmpdir is not None:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def pool_status(bind=None):
+    """Return live pool metrics (checked-out count, overflow, checkout waits)"""
+    pool = (bind or engine).pool
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is None:
+        return {'pool': pool.status()}
+    return metrics.snapshot(pool)
+
+
+# Dialect-specific INSERT constructs that support ON CONFLICT
+_UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def upsert_insert(bind):
+    """Return the INSERT construct supporting ON CONFLICT for `bind`'s dialect"""
+    dialect = bind.dialect.name
+    try:
+        return _UPSERT_INSERTS[dialect]
+    except KeyError:
+        raise ValueError(f"Upserts are not supported for the '{dialect}' dialect")
 
-# Create the database URL for PostgreSQL
-DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 # Create the SQLAlchemy engine
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_db_engine()
 
 # Base class for all ORM models
 Base = declarative_base()
@@ -23,10 +336,41 @@ Base = declarative_base()
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 
+# Async session factory; bound to the async engine on first use of get_async_engine()
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+_async_engine = None
+
+
 # Helper function to get a database session
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_async_engine():
+    """Return the shared AsyncEngine, creating it (and binding AsyncSessionLocal) on first call"""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_db_engine()
+        AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+
+async def dispose_async_engine():
+    """Close the shared AsyncEngine's connections; the next get_async_engine() creates a new one"""
+    global _async_engine
+    if _async_engine is not None:
+        async_engine, _async_engine = _async_engine, None
+        await async_engine.dispose()
+
+
+# Async counterpart of get_db. Await dispose_async_engine() before the event
+# loop closes: aiosqlite's connection threads otherwise keep the process alive.
+async def get_async_db():
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -6,7 +6,7 @@ This creates a many-to-many relationship between Students and Courses.
 Also stores additional enrollment data like grade and enrollment date.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from lib.db import Base
@@ -36,9 +36,13 @@ class Enrollment(Base):
     student = relationship('Student', back_populates='enrollments')
     course = relationship('Course', back_populates='enrollments')
 
-    # Ensure a student can only enroll in a course once
+    # Ensure a student can only enroll in a course once. The unique constraint
+    # also serves student_id lookups; course_id and enrollment_date need their own.
+    # (course_id, id) also matches the keyset order of a course's enrollment listing.
     __table_args__ = (
         UniqueConstraint('student_id', 'course_id', name='unique_student_course'),
+        Index('ix_enrollments_course_id_id', 'course_id', 'id'),
+        Index('ix_enrollments_enrollment_date', 'enrollment_date'),
     )
 
     def __repr__(self):
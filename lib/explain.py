@@ -0,0 +1,137 @@
+"""
+Query Plan Checks
+
+Captures EXPLAIN plans for the core queries and flags any that fall back to
+a full table scan, or to a full scan of an index (one not bounded by a
+condition on the index's leading column). Supports PostgreSQL (EXPLAIN
+FORMAT JSON, with sequential scans disabled so small test tables still show
+the index the planner would use at scale) and SQLite (EXPLAIN QUERY PLAN).
+
+Run `python -m lib.cli check-plans` to check the configured database; the
+command exits non-zero if any query regresses to a full scan.
+"""
+
+import functools
+import json
+import re
+from datetime import datetime
+
+from sqlalchemy import select, text
+
+from lib.student import Student
+from lib.course import Course
+from lib.enrolment import Enrollment
+from lib.reports import enrollment_select
+from lib import listing
+
+
+def core_queries():
+    """Return {name: statement} for the queries that must stay index-backed"""
+    return {
+        'student_by_email': select(Student).where(Student.email == 'someone@example.com'),
+        'course_by_code': select(Course).where(Course.code == 'CS101'),
+        'student_by_name': (
+            select(Student)
+            .where(Student.last_name == 'Smith', Student.first_name == 'Jane')
+        ),
+        'course_roster': enrollment_select().where(Enrollment.course_id == 1),
+        'student_transcript': enrollment_select().where(Enrollment.student_id == 1),
+        'enrollments_in_term': select(Enrollment).where(
+            Enrollment.enrollment_date >= datetime(2025, 1, 1),
+            Enrollment.enrollment_date < datetime(2025, 6, 1),
+        ),
+        'students_page': listing.list_students(
+            after=listing.encode_cursor(['Smith', 'Jane', 1])).statement,
+        'course_enrollments_page': listing.list_enrollments(
+            course_id=1, after=listing.encode_cursor([1])).statement,
+    }
+
+
+def _compile(stmt, dialect):
+    return str(stmt.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+
+def _postgresql_plan(conn, sql):
+    conn.execute(text('SET LOCAL enable_seqscan = off'))
+    plan = conn.execute(text(f'EXPLAIN (FORMAT JSON) {sql}')).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def _postgresql_leading_columns(conn):
+    """Return {index name: name of its first column}"""
+    return dict(conn.execute(text(
+        "SELECT c.relname, a.attname FROM pg_index i "
+        "JOIN pg_class c ON c.oid = i.indexrelid "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0] "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = current_schema()")).tuples().all())
+
+
+# Index scans that read the whole index unless bounded by an Index Cond
+_INDEX_SCANS = ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan')
+
+
+def _postgresql_full_scans(node, leading_columns, relation=None):
+    # With seq scans disabled the planner falls back to walking a whole index
+    # (e.g. the primary key plus a Filter) instead, so that counts as a full scan too
+    relation = node.get('Relation Name', relation)
+    scans = []
+    node_type = node.get('Node Type')
+    if node_type == 'Seq Scan':
+        scans.append(relation)
+    elif node_type in _INDEX_SCANS:
+        column = leading_columns.get(node.get('Index Name'))
+        cond = node.get('Index Cond', '')
+        if column is None or not re.search(rf'\b{re.escape(column)}\b', cond):
+            scans.append(relation or node.get('Index Name'))
+    for child in node.get('Plans', []):
+        # A Bitmap Index Scan's table is named on its parent Bitmap Heap Scan
+        scans.extend(_postgresql_full_scans(child, leading_columns, relation))
+    return scans
+
+
+def _sqlite_plan(conn, sql):
+    return [row.detail for row in conn.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+
+def _sqlite_full_scans(details):
+    # 'SCAN enrollments', with or without 'USING [COVERING] INDEX', reads the
+    # whole table or index; 'SEARCH ... USING INDEX' is a bounded lookup
+    return [d.split()[1] for d in details if d.startswith('SCAN ')]
+
+
+def capture_plans(bind, queries=None):
+    """
+    Return {name: {'plan': ..., 'full_scans': [table, ...]}} for each query
+
+    The plan is PostgreSQL's JSON plan tree or SQLite's list of plan details.
+    """
+    queries = core_queries() if queries is None else queries
+    dialect = bind.dialect
+    if dialect.name == 'postgresql':
+        explain, full_scans = _postgresql_plan, _postgresql_full_scans
+    elif dialect.name == 'sqlite':
+        explain, full_scans = _sqlite_plan, _sqlite_full_scans
+    else:
+        raise ValueError(f"Plan checks are not supported for the '{dialect.name}' dialect")
+
+    plans = {}
+    with bind.connect() as conn:
+        if dialect.name == 'postgresql':
+            with conn.begin():
+                leading_columns = _postgresql_leading_columns(conn)
+            full_scans = functools.partial(_postgresql_full_scans, leading_columns=leading_columns)
+        for name, stmt in queries.items():
+            with conn.begin():
+                plan = explain(conn, _compile(stmt, dialect))
+            plans[name] = {'plan': plan, 'full_scans': full_scans(plan)}
+    return plans
+
+
+def check_plans(bind, queries=None):
+    """Return {name: [table, ...]} for every query that does a full table scan"""
+    return {name: result['full_scans']
+            for name, result in capture_plans(bind, queries).items()
+            if result['full_scans']}
@@ -0,0 +1,66 @@
+"""
+Grade Summary Models
+
+Defines the precomputed analytics tables maintained by lib/analytics.py:
+per-student GPA totals and per-course grade distributions. Dashboards read
+these by primary key instead of scanning the enrollments table.
+"""
+
+from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from lib.db import Base
+
+class StudentGradeSummary(Base):
+    """
+    StudentGradeSummary Model
+
+    Attributes:
+        student_id (int): Primary key, foreign key to students table
+        graded_credits (int): Credits of courses with a GPA-bearing grade
+        quality_points (float): Sum of grade points weighted by course credits
+        graded_courses (int): Number of courses with a GPA-bearing grade
+    """
+    __tablename__ = 'student_grade_summaries'
+
+    student_id = Column(Integer, ForeignKey('students.id', ondelete='CASCADE'), primary_key=True)
+    graded_credits = Column(Integer, nullable=False, default=0)
+    quality_points = Column(Float, nullable=False, default=0.0)
+    graded_courses = Column(Integer, nullable=False, default=0)
+
+    @property
+    def gpa(self):
+        """Credit-weighted grade point average, or None with no graded credits"""
+        if not self.graded_credits:
+            return None
+        return round(self.quality_points / self.graded_credits, 2)
+
+    def __repr__(self):
+        return f"<StudentGradeSummary(student_id={self.student_id}, gpa={self.gpa}, graded_credits={self.graded_credits})>"
+
+    def to_dict(self):
+        """Convert student grade summary to dictionary"""
+        return {
+            'student_id': self.student_id,
+            'gpa': self.gpa,
+            'graded_credits': self.graded_credits,
+            'quality_points': round(self.quality_points, 2),
+            'graded_courses': self.graded_courses
+        }
+
+
+class CourseGradeDistribution(Base):
+    """
+    CourseGradeDistribution Model
+
+    Attributes:
+        course_id (int): Foreign key to courses table (part of primary key)
+        grade (str): Grade as stored on the enrollment (part of primary key)
+        count (int): Number of enrollments in the course with this grade
+    """
+    __tablename__ = 'course_grade_distributions'
+
+    course_id = Column(Integer, ForeignKey('courses.id', ondelete='CASCADE'), primary_key=True)
+    grade = Column(String(5), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CourseGradeDistribution(course_id={self.course_id}, grade='{self.grade}', count={self.count})>"
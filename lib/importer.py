@@ -0,0 +1,297 @@
+"""
+Bulk Importer
+
+Streams Student, Course and Enrollment rows from CSV or JSON Lines files
+into the database in fixed-size batches. Each batch is written with a single
+multi-row INSERT ... ON CONFLICT statement, so rows that already exist (by
+students.email, courses.code or unique_student_course) are updated instead of
+failing the whole batch.
+
+Bulk upserts bypass the ORM events that maintain derived data, so after the
+last batch (or the batch that failed) each import rebuilds it in one more
+transaction, for the students and courses the batches wrote only: GPA
+summaries of the students in imported courses (courses), and GPA summaries,
+grade distributions and seat counts (enrollments). Course capacity is not
+enforced on import; imported courses left with more seats taken than their
+capacity are reported in `ImportStats.over_capacity`.
+"""
+
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from sqlalchemy import func, select
+
+from lib import analytics, registration
+from lib.cache import lookup_cache
+from lib.db import SessionLocal, upsert_insert
+from lib.student import Student
+from lib.course import Course
+from lib.enrolment import Enrollment
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class ImportStats:
+    """
+    Import Statistics
+
+    Attributes:
+        kind (str): Kind of rows imported ('students', 'courses', 'enrollments')
+        rows (int): Number of rows written (inserted or updated)
+        skipped (int): Number of rows skipped (e.g. unknown student or course)
+        batches (int): Number of batches executed
+        elapsed (float): Wall-clock seconds spent importing
+        over_capacity (list): Codes of imported courses with more seats taken
+            than their capacity after the import
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.rows = 0
+        self.skipped = 0
+        self.batches = 0
+        self.elapsed = 0.0
+        self.over_capacity = []
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return (f"<ImportStats(kind='{self.kind}', rows={self.rows}, skipped={self.skipped}, "
+                f"batches={self.batches}, rows_per_sec={self.rows_per_sec:.0f})>")
+
+
+def read_rows(path):
+    """Yield rows as dicts from a CSV or JSON Lines file, one at a time"""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, newline='', encoding='utf-8') as fh:
+        if ext in ('.jsonl', '.ndjson', '.json'):
+            for line in fh:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(fh)
+
+
+def batched(iterable, size):
+    """Yield lists of at most `size` items from `iterable`"""
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _blank_to_none(value):
+    return None if value in ('', None) else value
+
+
+def _upsert(session, model, rows, key, update_cols, keep_cols=(), return_ids=False):
+    """
+    Write `rows` with one multi-row INSERT ... ON CONFLICT DO UPDATE
+
+    Columns in `keep_cols` keep their existing value when the incoming one is NULL.
+    With `return_ids`, returns the primary keys of the rows written.
+    """
+    insert = upsert_insert(session.get_bind())
+    table = model.__table__
+    stmt = insert(table).values(rows)
+    set_ = {col: stmt.excluded[col] for col in update_cols}
+    set_.update({col: func.coalesce(stmt.excluded[col], table.c[col]) for col in keep_cols})
+    stmt = stmt.on_conflict_do_update(index_elements=key, set_=set_)
+    if return_ids:
+        return list(session.scalars(stmt.returning(table.c.id)))
+    session.execute(stmt)
+
+
+def _dedupe(rows, key):
+    # ON CONFLICT cannot touch the same row twice in one statement; last row wins
+    return list({tuple(row[k] for k in key): row for row in rows}.values())
+
+
+def _student_row(raw):
+    return {
+        'first_name': raw['first_name'].strip(),
+        'last_name': raw['last_name'].strip(),
+        'email': raw['email'].strip().lower(),
+    }
+
+
+def _course_row(raw):
+    credits = _blank_to_none(raw.get('credits'))
+    capacity = _blank_to_none(raw.get('capacity'))
+    return {
+        'code': raw['code'].strip(),
+        'name': raw['name'].strip(),
+        'description': _blank_to_none(raw.get('description')),
+        'credits': int(credits) if credits is not None else 3,
+        'capacity': int(capacity) if capacity is not None else None,
+    }
+
+
+class KeyResolver:
+    """
+    In-memory lookup of natural keys to primary keys
+
+    Unknown keys in a batch are resolved with a single SELECT ... IN query and
+    remembered, so enrollment rows never trigger a per-row SELECT.
+    """
+
+    def __init__(self, session, column, id_column):
+        self.session = session
+        self.column = column
+        self.id_column = id_column
+        self.ids = {}
+
+    def resolve(self, keys):
+        missing = {k for k in keys if k not in self.ids}
+        if missing:
+            stmt = select(self.column, self.id_column).where(self.column.in_(missing))
+            self.ids.update(self.session.execute(stmt).tuples().all())
+        return self.ids
+
+
+class _Touched:
+    """Ids of the students and courses whose derived data an import must rebuild"""
+
+    def __init__(self):
+        self.student_ids = set()
+        self.course_ids = set()
+
+
+def _id_chunks(ids, size=500):
+    # Bounded IN lists, well under the drivers' bound parameter limits
+    ids = sorted(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _rebuild_courses(conn, touched):
+    # A credits change re-weights every GPA that includes the course
+    for chunk in _id_chunks(touched.course_ids):
+        analytics.recompute_student_summaries(
+            conn, select(Enrollment.student_id).where(Enrollment.course_id.in_(chunk)))
+
+
+def _rebuild_enrollments(conn, touched):
+    for chunk in _id_chunks(touched.student_ids):
+        analytics.recompute_student_summaries(conn, chunk)
+    for chunk in _id_chunks(touched.course_ids):
+        analytics.recompute_course_distributions(conn, chunk)
+        registration.recount_seats(conn, chunk)
+
+
+def _rebuild(db, stats, rebuild, touched):
+    if rebuild is None or not (touched.student_ids or touched.course_ids):
+        return
+    try:
+        conn = db.connection()
+        rebuild(conn, touched)
+        stats.over_capacity = sorted(code for chunk in _id_chunks(touched.course_ids)
+                                     for code in registration.over_capacity(conn, chunk))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _run(kind, path, batch_size, session, write_batch, rebuild=None):
+    stats = ImportStats(kind)
+    own_session = session is None
+    db = SessionLocal() if own_session else session
+    touched = _Touched()
+    start = time.perf_counter()
+    try:
+        try:
+            for batch in batched(read_rows(path), batch_size):
+                written, skipped = write_batch(db, batch, touched)
+                db.commit()
+                # Bulk upserts bypass the ORM events that invalidate cached lookups
+                lookup_cache.clear()
+                stats.rows += written
+                stats.skipped += skipped
+                stats.batches += 1
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            # Batches committed before a failure stay, so rebuild for them too
+            _rebuild(db, stats, rebuild, touched)
+    finally:
+        stats.elapsed = time.perf_counter() - start
+        if own_session:
+            db.close()
+    return stats
+
+
+def import_students(path, batch_size=DEFAULT_BATCH_SIZE, session=None):
+    """Upsert students from `path` keyed on email"""
+    def write_batch(db, batch, touched):
+        rows = _dedupe([_student_row(r) for r in batch], ['email'])
+        _upsert(db, Student, rows, ['email'], ['first_name', 'last_name'])
+        return len(rows), len(batch) - len(rows)
+
+    return _run('students', path, batch_size, session, write_batch)
+
+
+def import_courses(path, batch_size=DEFAULT_BATCH_SIZE, session=None):
+    """Upsert courses from `path` keyed on code"""
+    def write_batch(db, batch, touched):
+        rows = _dedupe([_course_row(r) for r in batch], ['code'])
+        touched.course_ids.update(_upsert(db, Course, rows, ['code'], ['name', 'description', 'credits'],
+                                          keep_cols=['capacity'], return_ids=True))
+        return len(rows), len(batch) - len(rows)
+
+    return _run('courses', path, batch_size, session, write_batch, _rebuild_courses)
+
+
+def import_enrollments(path, batch_size=DEFAULT_BATCH_SIZE, session=None):
+    """
+    Upsert enrollments from `path` keyed on (student, course)
+
+    Rows reference students by `email` and courses by `code`. Rows whose
+    student or course does not exist are counted as skipped.
+    """
+    resolvers = {}
+
+    def write_batch(db, batch, touched):
+        if not resolvers:
+            resolvers['student'] = KeyResolver(db, Student.email, Student.id)
+            resolvers['course'] = KeyResolver(db, Course.code, Course.id)
+        emails = [r['email'].strip().lower() for r in batch]
+        codes = [r['code'].strip() for r in batch]
+        student_ids = resolvers['student'].resolve(emails)
+        course_ids = resolvers['course'].resolve(codes)
+
+        rows = []
+        for raw, email, code in zip(batch, emails, codes):
+            student_id = student_ids.get(email)
+            course_id = course_ids.get(code)
+            if student_id is None or course_id is None:
+                continue
+            rows.append({
+                'student_id': student_id,
+                'course_id': course_id,
+                'grade': _blank_to_none(raw.get('grade')),
+            })
+        rows = _dedupe(rows, ['student_id', 'course_id'])
+        if rows:
+            _upsert(db, Enrollment, rows, ['student_id', 'course_id'], ['grade'])
+            touched.student_ids.update(row['student_id'] for row in rows)
+            touched.course_ids.update(row['course_id'] for row in rows)
+        return len(rows), len(batch) - len(rows)
+
+    return _run('enrollments', path, batch_size, session, write_batch, _rebuild_enrollments)
+
+
+IMPORTERS = {
+    'students': import_students,
+    'courses': import_courses,
+    'enrollments': import_enrollments,
+}
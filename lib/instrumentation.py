@@ -0,0 +1,241 @@
+"""
+SQL Instrumentation
+
+Opt-in statement timing built on SQLAlchemy engine and session events:
+
+- per-statement latency, aggregated by normalized SQL (literals and
+  expanded IN lists collapsed to placeholders)
+- a slow-query log for statements slower than a configurable threshold
+- N+1 detection: the same lazy-load SELECT fired `n_plus_one_threshold` or
+  more times within one session transaction, as happens when
+  `Enrollment.to_dict()` walks `student`/`course` for many rows
+
+Enable it with `instrument(engine)`, or set DB_INSTRUMENT=1 (and optionally
+DB_SLOW_QUERY_MS and DB_INSTRUMENT_DUMP=<path>) for the engine in lib/db.py.
+"""
+
+import atexit
+import json
+import logging
+import re
+import threading
+import time
+import weakref
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_THRESHOLD = 0.1
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10
+DEFAULT_SLOW_LOG_SIZE = 500
+
+_instruments = weakref.WeakKeyDictionary()
+
+_WHITESPACE = re.compile(r'\s+')
+_NAMED_PARAM = re.compile(r'%\([^)]*\)s|(?<!:):\w+|\$\d+|%s')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PARAM_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_ROW_LIST = re.compile(r'(\(\?(?:\.\.\.)?\))(?:\s*,\s*\(\?(?:\.\.\.)?\))+')
+
+
+def normalize(statement):
+    """Collapse whitespace, parameters, literals and IN/VALUES lists to a stable key"""
+    sql = _WHITESPACE.sub(' ', statement).strip()
+    sql = _NAMED_PARAM.sub('?', sql)
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PARAM_LIST.sub('(?...)', sql)
+    sql = _ROW_LIST.sub(r'\1, ...', sql)
+    return sql
+
+
+class StatementStats:
+    """
+    Aggregate timings for one normalized statement
+
+    Attributes:
+        statement (str): Normalized SQL
+        count (int): Number of executions
+        total (float): Total seconds spent executing
+        min (float): Fastest execution in seconds
+        max (float): Slowest execution in seconds
+    """
+
+    def __init__(self, statement):
+        self.statement = statement
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        self.min = elapsed if self.min is None else min(self.min, elapsed)
+        self.max = max(self.max, elapsed)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self):
+        """Convert statement stats to dictionary (times in milliseconds)"""
+        return {
+            'statement': self.statement,
+            'count': self.count,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.mean * 1000,
+            'min_ms': (self.min or 0.0) * 1000,
+            'max_ms': self.max * 1000
+        }
+
+
+class SQLInstrumentation:
+    """
+    Statement timing, slow-query log and N+1 detection for one engine
+
+    Attributes:
+        slow_threshold (float): Seconds above which a statement is logged as slow
+        n_plus_one_threshold (int): Repeated lazy loads per session that count as N+1
+        statements (dict): Normalized SQL -> StatementStats
+        slow_queries (deque): Most recent slow statements, newest last
+        n_plus_one (list): Detected N+1 patterns
+    """
+
+    def __init__(self, engine, slow_threshold=DEFAULT_SLOW_THRESHOLD,
+                 n_plus_one_threshold=DEFAULT_N_PLUS_ONE_THRESHOLD,
+                 slow_log_size=DEFAULT_SLOW_LOG_SIZE):
+        self.engine = engine
+        self.slow_threshold = slow_threshold
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._lock = threading.Lock()
+        self.statements = {}
+        self.slow_queries = deque(maxlen=slow_log_size)
+        self.n_plus_one = []
+        self._installed = False
+
+    # -- event wiring -------------------------------------------------------
+
+    def install(self):
+        if not self._installed:
+            event.listen(self.engine, 'before_cursor_execute', self._before_execute)
+            event.listen(self.engine, 'after_cursor_execute', self._after_execute)
+            event.listen(Session, 'do_orm_execute', self._orm_execute)
+            event.listen(Session, 'after_transaction_end', self._transaction_end)
+            self._installed = True
+        return self
+
+    def uninstall(self):
+        if self._installed:
+            event.remove(self.engine, 'before_cursor_execute', self._before_execute)
+            event.remove(self.engine, 'after_cursor_execute', self._after_execute)
+            event.remove(Session, 'do_orm_execute', self._orm_execute)
+            event.remove(Session, 'after_transaction_end', self._transaction_end)
+            self._installed = False
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._instrumentation_start = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, '_instrumentation_start', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        key = normalize(statement)
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = self.statements[key] = StatementStats(key)
+            stats.add(elapsed)
+            if elapsed >= self.slow_threshold:
+                self.slow_queries.append({
+                    'statement': statement,
+                    'parameters': repr(parameters)[:500],
+                    'duration_ms': elapsed * 1000,
+                    'timestamp': time.time(),
+                })
+        if elapsed >= self.slow_threshold:
+            logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, key)
+
+    def _orm_execute(self, orm_execute_state):
+        if not orm_execute_state.is_select or orm_execute_state.lazy_loaded_from is None:
+            return
+        session = orm_execute_state.session
+        if session.bind is not None and session.bind is not self.engine:
+            return
+        state = orm_execute_state.lazy_loaded_from
+        path = orm_execute_state.loader_strategy_path
+        relationship = str(path[-1]) if path else '?'
+        key = (state.class_.__name__, relationship)
+        counts = session.info.setdefault('_lazy_load_counts', {})
+        counts[key] = counts.get(key, 0) + 1
+        if counts[key] == self.n_plus_one_threshold:
+            finding = {
+                'model': key[0],
+                'relationship': relationship,
+                'statement': normalize(str(orm_execute_state.statement)),
+                'threshold': self.n_plus_one_threshold,
+                'timestamp': time.time(),
+            }
+            with self._lock:
+                self.n_plus_one.append(finding)
+            logger.warning("Possible N+1: %s lazy-loaded %d times in one session",
+                           relationship, counts[key])
+
+    def _transaction_end(self, session, transaction):
+        if transaction.parent is None:
+            session.info.pop('_lazy_load_counts', None)
+
+    # -- reporting ----------------------------------------------------------
+
+    def top(self, n=10, by='total'):
+        """Return the `n` hottest statements ordered by 'total', 'count', 'mean' or 'max'"""
+        with self._lock:
+            stats = list(self.statements.values())
+        stats.sort(key=lambda s: getattr(s, by), reverse=True)
+        return [s.to_dict() for s in stats[:n]]
+
+    def report(self):
+        """Return all collected data as a JSON-serializable dict"""
+        with self._lock:
+            statements = sorted(self.statements.values(), key=lambda s: s.total, reverse=True)
+            return {
+                'slow_threshold_ms': self.slow_threshold * 1000,
+                'n_plus_one_threshold': self.n_plus_one_threshold,
+                'statements': [s.to_dict() for s in statements],
+                'slow_queries': list(self.slow_queries),
+                'n_plus_one': list(self.n_plus_one),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.slow_queries.clear()
+            self.n_plus_one.clear()
+
+    def dump(self, path):
+        """Write report() as JSON to `path`"""
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(self.report(), fh, indent=2)
+
+    def dump_on_exit(self, path):
+        """Write report() to `path` when the interpreter exits"""
+        atexit.register(self.dump, path)
+
+
+def instrument(engine, **kwargs):
+    """Attach instrumentation to `engine` (once) and return it"""
+    existing = _instruments.get(engine)
+    if existing is not None:
+        return existing
+    inst = _instruments[engine] = SQLInstrumentation(engine, **kwargs).install()
+    return inst
+
+
+def instrumentation_for(engine):
+    """Return the instrumentation attached to `engine`, or None"""
+    return _instruments.get(engine)
@@ -0,0 +1,172 @@
+"""
+Listing Queries
+
+Shared listing and search API for students, courses and enrollments with
+keyset (cursor) pagination. Each page continues from the sort key of the
+previous page's last row (`WHERE (key...) > (cursor...)`) on an indexed
+ordering, so page 10,000 costs the same as page 1, unlike OFFSET.
+
+The listing functions only build a `ListQuery`; run it with `fetch()` on a
+Session or `await fetch_async()` on an AsyncSession:
+
+    page = fetch(session, list_students(search='Smi', limit=50))
+    page = await fetch_async(async_session, list_students(after=page.next_cursor))
+
+Prefix searches (`search=`) rely on code point ordering of the searched
+column, which is why Student.last_name and Course.code use the "C"
+collation on PostgreSQL; see `_prefix_range()`.
+"""
+
+import base64
+import json
+
+from sqlalchemy import select, tuple_
+
+from lib.student import Student
+from lib.course import Course
+from lib.enrolment import Enrollment
+from lib.reports import enrollment_select, enrollment_row_to_dict
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def encode_cursor(values):
+    """Encode a row's sort key as an opaque URL-safe cursor"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor()"""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+
+class Page:
+    """
+    One page of listing results
+
+    Attributes:
+        items (list): Rows as dicts, in the same shape as the models' to_dict()
+        next_cursor (str): Cursor for the next page, or None on the last page
+    """
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    def __repr__(self):
+        return f"<Page(items={len(self.items)}, next_cursor={self.next_cursor!r})>"
+
+    def to_dict(self):
+        """Convert page to dictionary"""
+        return {
+            'items': self.items,
+            'next_cursor': self.next_cursor
+        }
+
+
+class ListQuery:
+    """
+    A keyset-paginated SELECT, independent of sync or async execution
+
+    Attributes:
+        statement: SELECT with the keyset filter, ordering and LIMIT applied
+        limit (int): Page size
+    """
+
+    def __init__(self, stmt, key_columns, limit, after, serialize):
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        if after is not None:
+            values = decode_cursor(after)
+            # Cursors come from clients; a cursor from another listing must not reach SQL
+            if not isinstance(values, list) or len(values) != len(key_columns):
+                raise ValueError(f"Invalid cursor '{after}'")
+            stmt = stmt.where(tuple_(*key_columns) > tuple_(*values))
+        # One extra row tells us whether another page exists
+        self.statement = stmt.order_by(*key_columns).limit(limit + 1)
+        self.limit = limit
+        self._key_names = [col.key for col in key_columns]
+        self._serialize = serialize
+
+    def page(self, rows):
+        """Build a Page from the rows returned by `statement`"""
+        more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        next_cursor = None
+        if more:
+            last = rows[-1]._mapping
+            next_cursor = encode_cursor([last[name] for name in self._key_names])
+        return Page([self._serialize(row) for row in rows], next_cursor)
+
+
+def fetch(session, query):
+    """Run a ListQuery on a Session and return a Page"""
+    return query.page(session.execute(query.statement).all())
+
+
+async def fetch_async(session, query):
+    """Run a ListQuery on an AsyncSession and return a Page"""
+    result = await session.execute(query.statement)
+    return query.page(result.all())
+
+
+def _prefix_range(column, prefix):
+    # A range rather than LIKE 'x%', which only uses a plain b-tree index under
+    # the C collation (PostgreSQL) or case_sensitive_like (SQLite). The range is
+    # only exact under code point ordering, so the searched columns are declared
+    # COLLATE "C" on PostgreSQL; SQLite's default BINARY collation already is.
+    return (column >= prefix) & (column < prefix + '\U0010ffff')
+
+
+def _student_row_to_dict(row):
+    return {
+        'id': row.id,
+        'first_name': row.first_name,
+        'last_name': row.last_name,
+        'email': row.email,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def _course_row_to_dict(row):
+    return {
+        'id': row.id,
+        'code': row.code,
+        'name': row.name,
+        'description': row.description,
+        'credits': row.credits,
+        'capacity': row.capacity,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def list_students(search=None, after=None, limit=DEFAULT_LIMIT):
+    """List students by (last_name, first_name, id), optionally by last-name prefix"""
+    stmt = select(Student.id, Student.first_name, Student.last_name, Student.email, Student.created_at)
+    if search:
+        stmt = stmt.where(_prefix_range(Student.last_name, search))
+    return ListQuery(stmt, [Student.last_name, Student.first_name, Student.id],
+                     limit, after, _student_row_to_dict)
+
+
+def list_courses(search=None, after=None, limit=DEFAULT_LIMIT):
+    """List courses by code, optionally by code prefix"""
+    stmt = select(Course.id, Course.code, Course.name, Course.description,
+                  Course.credits, Course.capacity, Course.created_at)
+    if search:
+        stmt = stmt.where(_prefix_range(Course.code, search))
+    return ListQuery(stmt, [Course.code], limit, after, _course_row_to_dict)
+
+
+def list_enrollments(course_id=None, student_id=None, after=None, limit=DEFAULT_LIMIT):
+    """List enrollments by id, optionally for one course and/or student"""
+    stmt = enrollment_select()
+    if course_id is not None:
+        stmt = stmt.where(Enrollment.course_id == course_id)
+    if student_id is not None:
+        stmt = stmt.where(Enrollment.student_id == student_id)
+    return ListQuery(stmt, [Enrollment.id], limit, after, enrollment_row_to_dict)
@@ -0,0 +1,163 @@
+"""
+Registration Load Test
+
+Simulates a registration rush: many threads enroll students into a handful
+of small-capacity courses at once through lib/registration.py, with some of
+them dropping a course again (promoting the head of its waitlist), then
+checks that no course was over-allocated and that every request is
+accounted for.
+Like the benchmark, it runs on `lib.db.scratch_engine()`.
+
+    python -m lib.cli load-test --threads 16 --students 2000 --courses 5
+"""
+
+import random
+import threading
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from lib.db import scratch_engine
+from lib.schema import upgrade
+from lib.student import Student
+from lib.course import Course
+from lib.enrolment import Enrollment
+from lib.waitlist import WaitlistEntry
+from lib import registration
+
+
+def _seed(engine, students, courses, capacity):
+    with engine.begin() as conn:
+        conn.execute(Student.__table__.insert(), [
+            {'first_name': 'Load', 'last_name': f'Student{i}', 'email': f'load{i}@example.com'}
+            for i in range(students)])
+        conn.execute(Course.__table__.insert(), [
+            {'code': f'LOAD{i}', 'name': f'Load Course {i}', 'capacity': capacity}
+            for i in range(courses)])
+        student_ids = list(conn.scalars(select(Student.id)))
+        course_ids = list(conn.scalars(select(Course.id)))
+    return student_ids, course_ids
+
+
+def _verify(engine, course_ids, capacity, outcomes, drops, promoted):
+    errors = []
+    with Session(engine) as session:
+        enrolled = dict(session.execute(
+            select(Enrollment.course_id, func.count()).group_by(Enrollment.course_id)).tuples().all())
+        for course_id, seats_taken in session.execute(
+                select(Course.id, Course.seats_taken).where(Course.id.in_(course_ids))):
+            count = enrolled.get(course_id, 0)
+            if count > capacity:
+                errors.append(f"course {course_id} over-allocated: {count} > {capacity}")
+            if count != seats_taken:
+                errors.append(f"course {course_id} seats_taken={seats_taken} but {count} enrolled")
+        waitlisted = session.scalar(select(func.count()).select_from(WaitlistEntry))
+        overlap = session.scalar(
+            select(func.count()).select_from(WaitlistEntry).join(Enrollment, (
+                (Enrollment.student_id == WaitlistEntry.student_id)
+                & (Enrollment.course_id == WaitlistEntry.course_id))))
+    total_enrolled = sum(enrolled.values())
+    # A drop request may come before its enroll, so not every drop removes a row
+    dropped = outcomes.get(registration.ENROLLED, 0) + promoted - total_enrolled
+    if not 0 <= dropped <= drops:
+        errors.append(f"{outcomes.get(registration.ENROLLED, 0)} reported enrolled and {promoted} "
+                      f"promoted but {total_enrolled} enrollment rows after {drops} drops")
+    if outcomes.get(registration.WAITLISTED, 0) - promoted != waitlisted:
+        errors.append(f"{outcomes.get(registration.WAITLISTED, 0)} reported waitlisted and "
+                      f"{promoted} promoted but {waitlisted} waitlist rows")
+    if overlap:
+        errors.append(f"{overlap} students are both enrolled and waitlisted")
+    return errors
+
+
+def run(database_url=None, threads=16, students=2000, courses=5, capacity=100,
+        requests_per_student=2, batch_size=0, waitlist=True, drop_ratio=0.1, seed=42):
+    """
+    Run the load test and return a report dict
+
+    With `batch_size` > 0 each request enrolls that many students into one
+    course via `enroll_many`; otherwise each request is a single `enroll`.
+    A `drop_ratio` share of the (student, course) pairs also get a `drop`
+    request, shuffled in among the enrolls. The report's 'errors' list is
+    empty when all invariants hold.
+    """
+    with scratch_engine(database_url, pool_size=str(threads), max_overflow='0') as engine:
+        upgrade(engine)
+        student_ids, course_ids = _seed(engine, students, courses, capacity)
+
+        rng = random.Random(seed)
+        work = [(sid, cid) for sid in student_ids
+                for cid in rng.sample(course_ids, min(requests_per_student, len(course_ids)))]
+        rng.shuffle(work)
+        drops = [('drop', sid, cid) for sid, cid in rng.sample(work, int(len(work) * drop_ratio))]
+        if batch_size:
+            by_course = {}
+            for sid, cid in work:
+                by_course.setdefault(cid, []).append(sid)
+            work = [('enroll_many', chunk[i:i + batch_size], cid) for cid, chunk in by_course.items()
+                    for i in range(0, len(chunk), batch_size)]
+        else:
+            work = [('enroll', sid, cid) for sid, cid in work]
+        work += drops
+        rng.shuffle(work)
+
+        outcomes = {}
+        promoted = []
+        failures = []
+        lock = threading.Lock()
+        queue = iter(work)
+
+        def worker():
+            local = {}
+            with Session(engine) as session:
+                while True:
+                    with lock:
+                        item = next(queue, None)
+                    if item is None:
+                        break
+                    op, sid, cid = item
+                    try:
+                        if op == 'enroll_many':
+                            results = registration.enroll_many(session, cid, sid, waitlist=waitlist)
+                            for outcome in results.values():
+                                local[outcome] = local.get(outcome, 0) + 1
+                        elif op == 'enroll':
+                            outcome = registration.enroll(session, sid, cid, waitlist=waitlist)
+                            local[outcome] = local.get(outcome, 0) + 1
+                        else:
+                            promoted_id = registration.drop(session, sid, cid)
+                            if promoted_id is not None:
+                                with lock:
+                                    promoted.append(promoted_id)
+                    except Exception as exc:
+                        with lock:
+                            failures.append(repr(exc))
+            with lock:
+                for outcome, count in local.items():
+                    outcomes[outcome] = outcomes.get(outcome, 0) + count
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        requests = students * min(requests_per_student, len(course_ids)) + len(drops)
+        errors = _verify(engine, course_ids, capacity, outcomes, len(drops), len(promoted)) + failures
+        enrolled = outcomes.get(registration.ENROLLED, 0)
+        return {
+            'backend': engine.dialect.name,
+            'threads': threads,
+            'requests': requests,
+            'batch_size': batch_size,
+            'outcomes': outcomes,
+            'drops': len(drops),
+            'promoted': len(promoted),
+            'elapsed': elapsed,
+            'requests_per_sec': requests / elapsed if elapsed else 0.0,
+            'enrollments_per_sec': enrolled / elapsed if elapsed else 0.0,
+            'errors': errors,
+        }
@@ -0,0 +1,288 @@
+"""
+Course Registration
+
+Enrolls students into courses without over-allocating seats under
+concurrent load. `Course.seats_taken` is a counter claimed with a single
+conditional UPDATE (`seats_taken < capacity`), so the database serializes
+competing registrations on the course row instead of the application doing
+a read-count-then-insert. Batch registration locks the course row once and
+claims all of its seats in one transaction. Registering and dropping all
+lock the course row before touching enrollments, so they always take locks
+in the same order.
+
+Every function here runs its own transaction on the given session and
+commits (or rolls back) before returning, so row locks are held only for
+the duration of one registration.
+"""
+
+from collections import defaultdict
+
+from sqlalchemy import case, delete, event, func, inspect, select, update
+from sqlalchemy.orm import Session, object_session
+
+from lib.db import upsert_insert
+from lib.course import Course
+from lib.enrolment import Enrollment
+from lib.waitlist import WaitlistEntry
+
+# Registration outcomes
+ENROLLED = 'enrolled'
+ALREADY_ENROLLED = 'already_enrolled'
+WAITLISTED = 'waitlisted'
+FULL = 'full'
+
+
+def _has_seat():
+    return (Course.capacity.is_(None)) | (Course.seats_taken < Course.capacity)
+
+
+def _lock_course(session, course_id):
+    # A no-op UPDATE takes the course row lock (a write lock on SQLite) before
+    # enrollments are read or written
+    locked = session.execute(
+        update(Course).where(Course.id == course_id).values(seats_taken=Course.seats_taken)
+    ).rowcount
+    if not locked:
+        raise ValueError(f"Course {course_id} not found")
+
+
+def _add_to_waitlist(session, course_id, student_ids):
+    if not student_ids:
+        return
+    insert = upsert_insert(session.get_bind())
+    stmt = insert(WaitlistEntry.__table__).values(
+        [{'student_id': sid, 'course_id': course_id} for sid in student_ids])
+    session.execute(stmt.on_conflict_do_nothing(index_elements=['student_id', 'course_id']))
+
+
+def _remove_from_waitlist(session, course_id, student_ids):
+    session.execute(delete(WaitlistEntry).where(
+        WaitlistEntry.course_id == course_id, WaitlistEntry.student_id.in_(student_ids)))
+
+
+def enroll(session, student_id, course_id, waitlist=False):
+    """
+    Enroll one student, claiming a seat atomically
+
+    Returns ENROLLED, ALREADY_ENROLLED, or WAITLISTED/FULL when the course has
+    no free seat (depending on `waitlist`). Raises ValueError if the course
+    does not exist, like enroll_many().
+    """
+    insert = upsert_insert(session.get_bind())
+    try:
+        # Claim the seat first: like enroll_many(), lock the course row before
+        # touching enrollments, so the two cannot deadlock on each other
+        claimed = session.execute(
+            update(Course)
+            .where(Course.id == course_id, _has_seat())
+            .values(seats_taken=Course.seats_taken + 1)
+        ).rowcount
+        if claimed:
+            inserted = session.execute(
+                insert(Enrollment.__table__)
+                .values(student_id=student_id, course_id=course_id)
+                .on_conflict_do_nothing(index_elements=['student_id', 'course_id'])
+            ).rowcount
+            if not inserted:
+                # Already enrolled: give the seat back
+                session.rollback()
+                return ALREADY_ENROLLED
+            _remove_from_waitlist(session, course_id, [student_id])
+            session.commit()
+            return ENROLLED
+
+        # No seat claimed: the course is full or does not exist
+        _lock_course(session, course_id)
+        enrolled = session.scalar(select(Enrollment.id).where(
+            Enrollment.student_id == student_id, Enrollment.course_id == course_id))
+        if enrolled is not None:
+            session.rollback()
+            return ALREADY_ENROLLED
+        if not waitlist:
+            session.rollback()
+            return FULL
+        _add_to_waitlist(session, course_id, [student_id])
+        session.commit()
+        return WAITLISTED
+    except Exception:
+        session.rollback()
+        raise
+
+
+def enroll_many(session, course_id, student_ids, waitlist=False):
+    """
+    Enroll a batch of students into one course in a single transaction
+
+    Seats are handed out in `student_ids` order. Returns {student_id: outcome}.
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    try:
+        # Lock before seats are read, so concurrent batches cannot both see them free
+        _lock_course(session, course_id)
+        capacity, taken = session.execute(
+            select(Course.capacity, Course.seats_taken).where(Course.id == course_id)).one()
+        already = set(session.scalars(select(Enrollment.student_id).where(
+            Enrollment.course_id == course_id, Enrollment.student_id.in_(student_ids))))
+
+        results, to_enroll, to_wait = {}, [], []
+        for sid in student_ids:
+            if sid in already:
+                results[sid] = ALREADY_ENROLLED
+            elif capacity is None or taken + len(to_enroll) < capacity:
+                to_enroll.append(sid)
+                results[sid] = ENROLLED
+            elif waitlist:
+                to_wait.append(sid)
+                results[sid] = WAITLISTED
+            else:
+                results[sid] = FULL
+
+        if to_enroll:
+            insert = upsert_insert(session.get_bind())
+            inserted = set(session.scalars(
+                insert(Enrollment.__table__)
+                .values([{'student_id': sid, 'course_id': course_id} for sid in to_enroll])
+                .on_conflict_do_nothing(index_elements=['student_id', 'course_id'])
+                .returning(Enrollment.student_id)
+            ))
+            # Rows enrolled since `already` was read (e.g. through the ORM) keep their seat
+            for sid in to_enroll:
+                if sid not in inserted:
+                    results[sid] = ALREADY_ENROLLED
+            session.execute(update(Course).where(Course.id == course_id).values(
+                seats_taken=Course.seats_taken + len(inserted)))
+            _remove_from_waitlist(session, course_id, list(inserted))
+        _add_to_waitlist(session, course_id, to_wait)
+        session.commit()
+        return results
+    except Exception:
+        session.rollback()
+        raise
+
+
+def drop(session, student_id, course_id):
+    """
+    Drop a student from a course and promote the first waitlisted student
+
+    Returns the promoted student's id, or None. Raises ValueError if the
+    course does not exist.
+    """
+    try:
+        # Lock the course row before deleting, in the same order as enroll()
+        _lock_course(session, course_id)
+        enrollment = session.scalars(select(Enrollment).where(
+            Enrollment.student_id == student_id, Enrollment.course_id == course_id)).first()
+        if enrollment is None:
+            session.rollback()
+            return None
+        # Deleted through the ORM so the listeners release the seat and, for a
+        # graded enrollment, update the grade summaries
+        session.delete(enrollment)
+        session.flush()
+
+        # The course row is locked by this transaction, so the queue head is stable
+        promoted = session.scalars(
+            select(WaitlistEntry.student_id)
+            .where(WaitlistEntry.course_id == course_id)
+            .order_by(WaitlistEntry.id)
+            .limit(1)
+        ).first()
+        if promoted is not None:
+            claimed = session.execute(
+                update(Course)
+                .where(Course.id == course_id, _has_seat())
+                .values(seats_taken=Course.seats_taken + 1)
+            ).rowcount
+            if claimed:
+                session.execute(Enrollment.__table__.insert().values(
+                    student_id=promoted, course_id=course_id))
+                _remove_from_waitlist(session, course_id, [promoted])
+            else:
+                promoted = None
+        session.commit()
+        return promoted
+    except Exception:
+        session.rollback()
+        raise
+
+
+def recount_seats(conn, course_ids=None):
+    """Reset seats_taken from enrollments for all courses, or those in `course_ids`"""
+    enrolled = (
+        select(func.count(Enrollment.id))
+        .where(Enrollment.course_id == Course.id)
+        .scalar_subquery()
+    )
+    stmt = update(Course).values(seats_taken=enrolled)
+    if course_ids is not None:
+        stmt = stmt.where(Course.id.in_(course_ids))
+    conn.execute(stmt)
+
+
+def sync_seat_counts(bind):
+    """Reset every course's seats_taken from its enrollments (after bulk imports)"""
+    with bind.begin() as conn:
+        recount_seats(conn)
+
+
+def over_capacity(conn, course_ids=None):
+    """Return the codes of courses (optionally among `course_ids`) with more seats taken than capacity"""
+    stmt = (
+        select(Course.code)
+        .where(Course.capacity.is_not(None), Course.seats_taken > Course.capacity)
+        .order_by(Course.code)
+    )
+    if course_ids is not None:
+        stmt = stmt.where(Course.id.in_(course_ids))
+    return list(conn.scalars(stmt))
+
+
+# Enrollments created, moved or deleted through the ORM (rather than this
+# module) still keep the seat counters in step. The mapper events record a
+# per-course delta; after_flush applies them all in one UPDATE.
+_PENDING_SEATS = '_seat_count_changes'
+
+
+def _record(target, course_id, delta):
+    pending = object_session(target).info.setdefault(_PENDING_SEATS, defaultdict(int))
+    pending[course_id] += delta
+
+
+@event.listens_for(Enrollment, 'after_insert')
+def _enrollment_inserted(mapper, conn, target):
+    _record(target, target.course_id, 1)
+
+
+@event.listens_for(Enrollment, 'after_update')
+def _enrollment_updated(mapper, conn, target):
+    history = inspect(target).attrs.course_id.history
+    if history.deleted and history.added:
+        _record(target, history.deleted[0], -1)
+        _record(target, history.added[0], 1)
+
+
+@event.listens_for(Enrollment, 'after_delete')
+def _enrollment_deleted(mapper, conn, target):
+    history = inspect(target).attrs.course_id.history
+    _record(target, history.deleted[0] if history.deleted else target.course_id, -1)
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_seat_changes(session, flush_context):
+    pending = session.info.pop(_PENDING_SEATS, None)
+    if not pending:
+        return
+    deleted_courses = {obj.id for obj in session.deleted if isinstance(obj, Course)}
+    deltas = {course_id: delta for course_id, delta in pending.items()
+              if delta and course_id not in deleted_courses}
+    if deltas:
+        session.connection().execute(
+            update(Course)
+            .where(Course.id.in_(deltas))
+            .values(seats_taken=Course.seats_taken + case(deltas, value=Course.id))
+        )
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back(session):
+    session.info.pop(_PENDING_SEATS, None)
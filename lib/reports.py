@@ -0,0 +1,114 @@
+"""
+Enrollment Reports
+
+Batch serialization for course rosters, student transcripts and full
+enrollment dumps. Each report is a single joined, column-only SELECT that is
+streamed with a server-side cursor (`yield_per`), so no ORM objects are built
+and no lazy `student`/`course` loads are fired per row. Rows come out in the
+same shape as `Enrollment.to_dict()`.
+"""
+
+import csv
+import json
+
+from sqlalchemy import select
+
+from lib.student import Student
+from lib.course import Course
+from lib.enrolment import Enrollment
+
+DEFAULT_YIELD_PER = 1000
+
+# Same keys, in the same order, as Enrollment.to_dict()
+ENROLLMENT_FIELDS = [
+    'id', 'student_id', 'course_id', 'grade', 'enrollment_date',
+    'student_name', 'course_name', 'course_code',
+]
+
+
+def enrollment_select():
+    """Column-only SELECT of enrollments joined to their student and course"""
+    return (
+        select(
+            Enrollment.id,
+            Enrollment.student_id,
+            Enrollment.course_id,
+            Enrollment.grade,
+            Enrollment.enrollment_date,
+            Student.first_name,
+            Student.last_name,
+            Course.name.label('course_name'),
+            Course.code.label('course_code'),
+        )
+        .join(Student, Enrollment.student_id == Student.id)
+        .join(Course, Enrollment.course_id == Course.id)
+    )
+
+
+def enrollment_row_to_dict(row):
+    """Convert an enrollment_select() row to the Enrollment.to_dict() shape"""
+    return {
+        'id': row.id,
+        'student_id': row.student_id,
+        'course_id': row.course_id,
+        'grade': row.grade,
+        'enrollment_date': row.enrollment_date.isoformat() if row.enrollment_date else None,
+        'student_name': f"{row.first_name} {row.last_name}",
+        'course_name': row.course_name,
+        'course_code': row.course_code,
+    }
+
+
+def _stream(session, stmt, yield_per):
+    result = session.execute(stmt, execution_options={'yield_per': yield_per})
+    for row in result:
+        yield enrollment_row_to_dict(row)
+
+
+def course_roster(session, course_id, yield_per=DEFAULT_YIELD_PER):
+    """Yield enrollment dicts for every student in a course, ordered by name"""
+    stmt = (
+        enrollment_select()
+        .where(Enrollment.course_id == course_id)
+        .order_by(Student.last_name, Student.first_name, Enrollment.id)
+    )
+    return _stream(session, stmt, yield_per)
+
+
+def student_transcript(session, student_id, yield_per=DEFAULT_YIELD_PER):
+    """Yield enrollment dicts for every course a student took, oldest first"""
+    stmt = (
+        enrollment_select()
+        .where(Enrollment.student_id == student_id)
+        .order_by(Enrollment.enrollment_date, Enrollment.id)
+    )
+    return _stream(session, stmt, yield_per)
+
+
+def enrollment_dump(session, yield_per=DEFAULT_YIELD_PER):
+    """Yield enrollment dicts for every enrollment in the database"""
+    stmt = enrollment_select().order_by(Enrollment.id)
+    return _stream(session, stmt, yield_per)
+
+
+def write_jsonl(rows, path):
+    """Write dict rows to a JSON Lines file; returns the number of rows written"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as fh:
+        for row in rows:
+            fh.write(json.dumps(row))
+            fh.write('\n')
+            count += 1
+    return count
+
+
+def write_csv(rows, path, fieldnames=ENROLLMENT_FIELDS):
+    """Write dict rows to a CSV file; returns the number of rows written"""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as fh:
+        writer = csv.DictWriter(fh, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
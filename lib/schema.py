@@ -0,0 +1,125 @@
+"""
+Schema Management
+
+`create_all` only creates missing tables; it never adds columns or indexes
+to tables that already exist. `upgrade()` creates missing tables, then adds
+any column and index declared on the models that the database does not have
+yet, so existing databases pick them up without being rebuilt. Added columns
+must be nullable or have a server default. Indexes listed in
+`_REPLACED_INDEXES` are dropped once their replacement exists. On PostgreSQL,
+columns whose collation differs from the model's are altered to match,
+which also rebuilds their indexes.
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+
+from lib.db import Base, engine as default_engine
+from lib.course import Course
+from lib.grade_summary import StudentGradeSummary, CourseGradeDistribution
+from lib import analytics, registration
+
+# Indexes dropped by upgrade() once the model index replacing them exists
+_REPLACED_INDEXES = {
+    'ix_enrollments_course_id': 'ix_enrollments_course_id_id',
+    'ix_students_last_name_first_name': 'ix_students_last_name_first_name_id',
+}
+
+# Derived tables that must be filled from existing data when first created
+_SUMMARY_TABLES = {StudentGradeSummary.__tablename__, CourseGradeDistribution.__tablename__}
+
+
+def missing_tables(bind):
+    """Return model tables that do not exist in the database"""
+    existing = set(inspect(bind).get_table_names())
+    return [table for table in Base.metadata.sorted_tables if table.name not in existing]
+
+
+def missing_columns(bind):
+    """Return model columns whose table exists but the column does not"""
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {col['name'] for col in inspector.get_columns(table.name)}
+        missing.extend(col for col in table.columns if col.name not in existing)
+    return missing
+
+
+def missing_indexes(bind):
+    """Return model indexes that do not exist in the database"""
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        missing.extend(ix for ix in table.indexes if ix.name not in existing)
+    return missing
+
+
+def mismatched_collations(bind):
+    """Return existing model columns whose collation differs from the model's (PostgreSQL)"""
+    dialect = bind.dialect
+    if dialect.name != 'postgresql':
+        return []
+    existing = {
+        (row.table_name, row.column_name): row.collation_name
+        for row in bind.execute(text(
+            "SELECT table_name, column_name, collation_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema()"))
+    }
+    mismatched = []
+    for table in Base.metadata.sorted_tables:
+        for column in table.columns:
+            collation = getattr(column.type.dialect_impl(dialect), 'collation', None)
+            key = (table.name, column.name)
+            if collation and key in existing and existing[key] != collation:
+                mismatched.append(column)
+    return mismatched
+
+
+def replaced_indexes(bind):
+    """Return the names of existing indexes superseded by a model index"""
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    existing = set()
+    for table in Base.metadata.sorted_tables:
+        if table.name in existing_tables:
+            existing.update(ix['name'] for ix in inspector.get_indexes(table.name))
+    return [name for name in _REPLACED_INDEXES if name in existing]
+
+
+def upgrade(bind=None):
+    """Create missing tables, columns and indexes; returns the names of those added"""
+    bind = bind or default_engine
+    with bind.begin() as conn:
+        tables = missing_tables(conn)
+        columns = missing_columns(conn)
+        collations = mismatched_collations(conn)
+        indexes = missing_indexes(conn)
+        Base.metadata.create_all(bind=conn)
+        for column in columns:
+            ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {column.table.name} ADD COLUMN {ddl}"))
+        for column in collations:
+            # Rebuilds the column's indexes with the new collation too
+            type_ddl = conn.dialect.type_compiler_instance.process(column.type.dialect_impl(conn.dialect))
+            conn.execute(text(
+                f"ALTER TABLE {column.table.name} ALTER COLUMN {column.name} TYPE {type_ddl}"))
+        for index in indexes:
+            index.create(bind=conn, checkfirst=True)
+        for name in replaced_indexes(conn):
+            conn.execute(text(f"DROP INDEX {name}"))
+    if Course.__table__.c.seats_taken in columns:
+        registration.sync_seat_counts(bind)
+    if _SUMMARY_TABLES & {table.name for table in tables}:
+        # Grades recorded before the summary tables existed; the listeners only apply deltas
+        analytics.recompute(bind)
+    return ([table.name for table in tables]
+            + [f"{col.table.name}.{col.name}" for col in columns]
+            + [f"{col.table.name}.{col.name} collation" for col in collations]
+            + [index.name for index in indexes])
@@ -5,7 +5,7 @@ Defines the Student entity with SQLAlchemy ORM.
 A student can enroll in multiple courses (many-to-many relationship).
 """
 
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from lib.db import Base
@@ -26,13 +26,22 @@ class Student(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     first_name = Column(String(100), nullable=False)
-    last_name = Column(String(100), nullable=False)
+    # "C" collation (code point order) on PostgreSQL makes the prefix search in
+    # lib/listing.py an exact index range; SQLite already compares this way
+    last_name = Column(String(100).with_variant(String(100, collation='C'), 'postgresql'),
+                       nullable=False)
     email = Column(String(255), unique=True, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
 
     # Relationship to enrollments (one student can have many enrollments)
     enrollments = relationship('Enrollment', back_populates='student', cascade='all, delete-orphan')
 
+    # Name searches filter on last name, then first name; id completes the
+    # keyset order of the student listing
+    __table_args__ = (
+        Index('ix_students_last_name_first_name_id', 'last_name', 'first_name', 'id'),
+    )
+
     def __repr__(self):
         return f"<Student(id={self.id}, name='{self.first_name} {self.last_name}', email='{self.email}')>"
 
@@ -0,0 +1,84 @@
+"""
+Synthetic Data Generator
+
+Deterministic generator of Student, Course and Enrollment rows for
+benchmarks and load tests. The same seed and counts always produce the same
+rows, so results can be compared between versions.
+"""
+
+import random
+
+FIRST_NAMES = ['Amina', 'Brian', 'Chen', 'Diana', 'Emeka', 'Fatima', 'George', 'Hana',
+               'Ivan', 'Joy', 'Kofi', 'Lena', 'Milton', 'Nia', 'Omar', 'Priya']
+LAST_NAMES = ['Achieng', 'Brown', 'Cohen', 'Dlamini', 'Evans', 'Garcia', 'Hassan', 'Ito',
+              'Kamau', 'Lee', 'Mensah', 'Novak', 'Otieno', 'Patel', 'Rossi', 'Smith']
+SUBJECTS = ['CS', 'MATH', 'PHYS', 'CHEM', 'BIO', 'ECON', 'HIST', 'ENG']
+GRADES = ['A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'D', 'F', None]
+
+
+class SyntheticDataset:
+    """
+    Deterministic synthetic dataset
+
+    Attributes:
+        students (int): Number of students to generate
+        courses (int): Number of courses to generate
+        enrollments_per_student (int): Courses each student enrolls in
+        seed (int): Random seed; same seed and counts give the same rows
+    """
+
+    def __init__(self, students=1000, courses=50, enrollments_per_student=5, seed=42):
+        self.students = students
+        self.courses = courses
+        self.enrollments_per_student = min(enrollments_per_student, courses)
+        self.seed = seed
+
+    def student_rows(self):
+        """Yield student dicts; emails are student{i}@example.com"""
+        rng = random.Random(f"{self.seed}-students")
+        for i in range(self.students):
+            yield {
+                'first_name': rng.choice(FIRST_NAMES),
+                'last_name': rng.choice(LAST_NAMES),
+                'email': self.student_email(i),
+            }
+
+    def course_rows(self):
+        """Yield course dicts; codes are <SUBJECT><number>"""
+        rng = random.Random(f"{self.seed}-courses")
+        for i in range(self.courses):
+            yield {
+                'code': self.course_code(i),
+                'name': f"{SUBJECTS[i % len(SUBJECTS)]} Topic {i}",
+                'description': f"Synthetic course {i}",
+                'credits': rng.choice([2, 3, 3, 4]),
+            }
+
+    def enrollment_pairs(self):
+        """Yield (student_index, course_index, grade) tuples"""
+        rng = random.Random(f"{self.seed}-enrollments")
+        for s in range(self.students):
+            for c in rng.sample(range(self.courses), self.enrollments_per_student):
+                yield s, c, rng.choice(GRADES)
+
+    def enrollment_rows(self):
+        """Yield enrollment dicts keyed by email/code, as read by lib/importer.py"""
+        for s, c, grade in self.enrollment_pairs():
+            yield {'email': self.student_email(s), 'code': self.course_code(c), 'grade': grade}
+
+    @staticmethod
+    def student_email(index):
+        return f"student{index}@example.com"
+
+    @staticmethod
+    def course_code(index):
+        return f"{SUBJECTS[index % len(SUBJECTS)]}{1000 + index}"
+
+    def to_dict(self):
+        """Convert dataset parameters to dictionary"""
+        return {
+            'students': self.students,
+            'courses': self.courses,
+            'enrollments_per_student': self.enrollments_per_student,
+            'seed': self.seed
+        }
@@ -0,0 +1,46 @@
+"""
+Waitlist Model
+
+Defines the WaitlistEntry entity with SQLAlchemy ORM.
+Students queue for a full course in arrival order and are promoted by
+lib/registration.py when a seat frees up.
+"""
+
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, UniqueConstraint, Index
+from sqlalchemy.sql import func
+from lib.db import Base
+
+class WaitlistEntry(Base):
+    """
+    WaitlistEntry Model
+
+    Attributes:
+        id (int): Primary key, auto-incremented; also the queue position
+        student_id (int): Foreign key to students table
+        course_id (int): Foreign key to courses table
+        created_at (datetime): Timestamp when student joined the waitlist
+    """
+    __tablename__ = 'waitlist_entries'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    student_id = Column(Integer, ForeignKey('students.id', ondelete='CASCADE'), nullable=False)
+    course_id = Column(Integer, ForeignKey('courses.id', ondelete='CASCADE'), nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+    # A student waits for a course at most once; the queue is read per course in id order
+    __table_args__ = (
+        UniqueConstraint('student_id', 'course_id', name='unique_waitlist_student_course'),
+        Index('ix_waitlist_entries_course_id_id', 'course_id', 'id'),
+    )
+
+    def __repr__(self):
+        return f"<WaitlistEntry(id={self.id}, student_id={self.student_id}, course_id={self.course_id})>"
+
+    def to_dict(self):
+        """Convert waitlist entry to dictionary"""
+        return {
+            'id': self.id,
+            'student_id': self.student_id,
+            'course_id': self.course_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
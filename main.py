@@ -1,9 +1,8 @@
 # main.py
-from lib.db import Base, engine
-from lib.student import Student
-from lib.course import Course
-from lib.enrolment import Enrollment
+from lib.schema import upgrade
 
 print(" Creating tables...")
-Base.metadata.create_all(bind=engine)
+created = upgrade()
 print("Tables created successfully!")
+if created:
+    print(f"Added: {', '.join(created)}")
@@ -0,0 +1,15 @@
+"""Shared test fixtures"""
+
+import pytest
+
+from lib.db import DEFAULTS, create_db_engine
+from lib.schema import upgrade
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """An engine on a migrated SQLite file private to the test"""
+    engine = create_db_engine({**DEFAULTS, 'url': f"sqlite:///{tmp_path / 'test.db'}"})
+    upgrade(engine)
+    yield engine
+    engine.dispose()
@@ -0,0 +1,98 @@
+"""Tests for the flush-time grade summary maintenance"""
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from lib.student import Student
+from lib.course import Course
+from lib.enrolment import Enrollment
+from lib import analytics
+
+
+@pytest.fixture
+def ids(engine):
+    with Session(engine) as session:
+        students = [Student(first_name='S', last_name=str(i), email=f's{i}@example.com')
+                    for i in range(20)]
+        courses = [Course(code='CS101', name='Intro', credits=4),
+                   Course(code='CS102', name='Data', credits=3)]
+        session.add_all(students + courses)
+        session.commit()
+        return [s.id for s in students], [c.id for c in courses]
+
+
+def _snapshot(engine):
+    with Session(engine) as session:
+        summaries = {s: analytics.student_gpa(session, s)
+                     for s in session.scalars(select(Student.id))}
+        distributions = {c: analytics.course_distribution(session, c)
+                         for c in session.scalars(select(Course.id))}
+        return summaries, distributions
+
+
+def _assert_matches_recompute(engine):
+    incremental = _snapshot(engine)
+    analytics.recompute(engine)
+    assert incremental == _snapshot(engine)
+
+
+def test_flush_writes_one_statement_per_summary_table(engine, ids):
+    student_ids, (cs101, cs102) = ids
+    statements = []
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0:3])
+
+    with Session(engine) as session:
+        session.add_all(Enrollment(student_id=sid, course_id=cs101, grade='A') for sid in student_ids)
+        session.commit()
+    event.remove(engine, 'before_cursor_execute', _count)
+
+    kinds = [' '.join(s) for s in statements]
+    assert sum(k.startswith('INSERT INTO student_grade_summaries') for k in kinds) == 1
+    assert sum(k.startswith('INSERT INTO course_grade_distributions') for k in kinds) == 1
+    assert sum(k.startswith('SELECT courses.id') for k in kinds) == 1
+    with Session(engine) as session:
+        assert analytics.course_distribution(session, cs101) == {'A': len(student_ids)}
+    _assert_matches_recompute(engine)
+
+
+def test_updates_moves_and_cascaded_deletes_match_recompute(engine, ids):
+    student_ids, (cs101, cs102) = ids
+    with Session(engine) as session:
+        session.add_all(Enrollment(student_id=sid, course_id=cs101, grade='B') for sid in student_ids)
+        session.add(Enrollment(student_id=student_ids[0], course_id=cs102, grade='A'))
+        session.commit()
+
+        enrollments = session.scalars(select(Enrollment).where(Enrollment.course_id == cs101)).all()
+        enrollments[1].grade = 'A'
+        enrollments[2].grade = None
+        enrollments[3].course_id = cs102
+        session.delete(enrollments[4])
+        session.delete(session.get(Student, student_ids[0]))
+        session.get(Course, cs102).credits = 1
+        session.commit()
+    _assert_matches_recompute(engine)
+
+    with Session(engine) as session:
+        session.delete(session.get(Course, cs102))
+        session.commit()
+    _assert_matches_recompute(engine)
+
+
+def test_failed_flush_discards_recorded_changes(engine, ids):
+    student_ids, (cs101, _cs102) = ids
+    with Session(engine) as session:
+        session.add(Enrollment(student_id=student_ids[0], course_id=cs101, grade='A'))
+        session.add(Enrollment(student_id=student_ids[0], course_id=cs101, grade='A'))
+        with pytest.raises(Exception):
+            session.commit()
+        session.rollback()
+
+        session.add(Enrollment(student_id=student_ids[1], course_id=cs101, grade='C'))
+        session.commit()
+    _assert_matches_recompute(engine)
+    with Session(engine) as session:
+        assert analytics.course_distribution(session, cs101) == {'C': 1}
@@ -0,0 +1,105 @@
+"""Tests for lib/cache.py invalidation against a SQLite file database"""
+
+import pytest
+from sqlalchemy.orm import Session
+
+from lib.student import Student
+from lib import cache
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    cache.lookup_cache.clear()
+    yield
+    cache.lookup_cache.clear()
+
+
+@pytest.fixture
+def student_id(engine):
+    with Session(engine) as session:
+        student = Student(first_name='OLD', last_name='Lee', email='lee@example.com')
+        session.add(student)
+        session.commit()
+        return student.id
+
+
+def test_read_between_flush_and_commit_is_invalidated_on_commit(engine, student_id):
+    with Session(engine) as writer, Session(engine) as reader:
+        student = writer.get(Student, student_id)
+        student.first_name = 'NEW'
+        writer.flush()
+
+        # The reader still sees the committed row and caches it
+        assert cache.get_student(reader, student_id)['first_name'] == 'OLD'
+        reader.rollback()
+
+        writer.commit()
+        assert cache.get_student(reader, student_id)['first_name'] == 'NEW'
+
+
+def test_unflushed_edit_is_not_cached(engine, student_id):
+    with Session(engine, autoflush=False) as writer, Session(engine) as other:
+        student = writer.get(Student, student_id)
+        student.first_name = 'DIRTY'
+        assert cache.get_student(writer, student_id)['first_name'] == 'DIRTY'
+        writer.rollback()
+
+        assert cache.get_student(other, student_id)['first_name'] == 'OLD'
+
+
+def test_flushed_uncommitted_edit_is_not_cached(engine, student_id):
+    with Session(engine) as writer, Session(engine) as other:
+        student = writer.get(Student, student_id)
+        student.first_name = 'FLUSHED'
+        writer.flush()
+        assert cache.get_student(writer, student_id)['first_name'] == 'FLUSHED'
+        writer.rollback()
+
+        assert cache.get_student(other, student_id)['first_name'] == 'OLD'
+
+
+def test_unchanged_row_is_served_from_cache(engine, student_id):
+    with Session(engine) as session:
+        cache.get_student_by_email(session, 'lee@example.com')
+        hits = cache.lookup_cache.hits
+        assert cache.get_student_by_email(session, 'lee@example.com')['first_name'] == 'OLD'
+        assert cache.lookup_cache.hits == hits + 1
+
+
+def test_set_after_invalidation_is_skipped():
+    lookups = cache.LookupCache()
+    tag = ('students', 1)
+    generation = lookups.generation()
+    lookups.invalidate(tag)
+    lookups.set('key', tag, {'id': 1}, generation)
+    assert lookups.get('key') is None
+
+    lookups.set('key', tag, {'id': 1}, lookups.generation())
+    assert lookups.get('key') == {'id': 1}
+
+
+def test_trimmed_invalidations_still_block_older_loads():
+    lookups = cache.LookupCache(maxsize=2)
+    generation = lookups.generation()
+    for i in range(5):
+        lookups.invalidate(('students', i))
+    lookups.set('key', ('students', 0), {'id': 0}, generation)
+    assert lookups.get('key') is None
+
+
+def test_commit_between_select_and_cache_write_wins(engine, student_id, monkeypatch):
+    set_ = cache.lookup_cache.set
+
+    def commit_then_set(*args):
+        # The reader has loaded the old row; a writer commits before it is cached
+        with Session(engine) as writer:
+            writer.get(Student, student_id).first_name = 'NEW'
+            writer.commit()
+        monkeypatch.setattr(cache.lookup_cache, 'set', set_)
+        set_(*args)
+
+    monkeypatch.setattr(cache.lookup_cache, 'set', commit_then_set)
+    with Session(engine) as reader:
+        assert cache.get_student(reader, student_id)['first_name'] == 'OLD'
+    with Session(engine) as reader:
+        assert cache.get_student(reader, student_id)['first_name'] == 'NEW'
@@ -0,0 +1,85 @@
+"""Tests for lib/importer.py derived-data rebuilds"""
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from lib.student import Student
+from lib.course import Course
+from lib import analytics, importer, registration
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+def _write(path, lines):
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def test_enrollment_import_rebuilds_summaries_and_reports_over_capacity(session, tmp_path):
+    importer.import_students(_write(tmp_path / 's.csv', [
+        'first_name,last_name,email', 'Ann,Lee,ann@example.com', 'Bob,Kim,bob@example.com',
+    ]), session=session)
+    importer.import_courses(_write(tmp_path / 'c.csv', [
+        'code,name,credits,capacity', 'CS101,Intro,4,1', 'CS102,Data,2,',
+    ]), session=session)
+    stats = importer.import_enrollments(_write(tmp_path / 'e.csv', [
+        'email,code,grade',
+        'ann@example.com,CS101,A', 'bob@example.com,CS101,B', 'ann@example.com,CS102,C',
+    ]), session=session)
+
+    assert stats.rows == 3
+    assert stats.over_capacity == ['CS101']
+    courses = {c.code: c for c in session.scalars(select(Course))}
+    assert courses['CS101'].seats_taken == 2
+    assert courses['CS102'].seats_taken == 1
+    assert analytics.course_distribution(session, courses['CS101'].id) == {'A': 1, 'B': 1}
+    ann = session.scalar(select(Student.id).where(Student.email == 'ann@example.com'))
+    assert analytics.student_gpa(session, ann)['gpa'] == round((4 * 4.0 + 2 * 2.0) / 6, 2)
+
+
+def test_failed_import_rebuilds_for_committed_batches(session, tmp_path):
+    importer.import_students(_write(tmp_path / 's.csv', ['first_name,last_name,email'] + [
+        f'S,{i},s{i}@example.com' for i in range(4)]), session=session)
+    importer.import_courses(_write(tmp_path / 'c.csv', [
+        'code,name,credits,capacity', 'CS101,Intro,4,2',
+    ]), session=session)
+    path = _write(tmp_path / 'e.jsonl', [
+        '{"email": "s0@example.com", "code": "CS101", "grade": "A"}',
+        '{"email": "s1@example.com", "code": "CS101", "grade": "B"}',
+        '{"email": "s2@example.com", "code": "CS101", "grade": "A"}',
+        '{"email": "s3@example.com"}',
+    ])
+
+    with pytest.raises(KeyError):
+        importer.import_enrollments(path, batch_size=1, session=session)
+
+    course = session.scalars(select(Course)).one()
+    session.refresh(course)
+    assert course.seats_taken == 3
+    assert analytics.course_distribution(session, course.id) == {'A': 2, 'B': 1}
+    s3 = session.scalar(select(Student.id).where(Student.email == 's3@example.com'))
+    assert registration.enroll(session, s3, course.id) == registration.FULL
+
+
+def test_import_only_rebuilds_what_it_touched(session, tmp_path):
+    importer.import_students(_write(tmp_path / 's.csv', [
+        'first_name,last_name,email', 'Ann,Lee,ann@example.com',
+    ]), session=session)
+    importer.import_courses(_write(tmp_path / 'c.csv', [
+        'code,name,credits,capacity', 'CS101,Intro,4,', 'CS102,Data,2,',
+    ]), session=session)
+    # Deliberately stale counter on a course the next import does not mention
+    session.execute(update(Course).where(Course.code == 'CS102').values(seats_taken=99))
+    session.commit()
+
+    importer.import_enrollments(_write(tmp_path / 'e.csv', [
+        'email,code,grade', 'ann@example.com,CS101,A',
+    ]), session=session)
+
+    seats = dict(session.execute(select(Course.code, Course.seats_taken)).tuples().all())
+    assert seats == {'CS101': 1, 'CS102': 99}
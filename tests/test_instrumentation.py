@@ -0,0 +1,21 @@
+"""Tests for lib/instrumentation.py statement normalization"""
+
+import pytest
+
+from lib.instrumentation import normalize
+
+
+@pytest.mark.parametrize('statement, expected', [
+    ('SELECT * FROM students\n  WHERE id = :id_1', 'SELECT * FROM students WHERE id = ?'),
+    ('SELECT * FROM students WHERE id = %(id_1)s', 'SELECT * FROM students WHERE id = ?'),
+    ('SELECT * FROM students WHERE id = $1', 'SELECT * FROM students WHERE id = ?'),
+    ("SELECT * FROM courses WHERE code = 'CS101' AND credits > 3",
+     'SELECT * FROM courses WHERE code = ? AND credits > ?'),
+    ('SELECT * FROM students WHERE id IN (?, ?, ?)', 'SELECT * FROM students WHERE id IN (?...)'),
+    ('INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)', 'INSERT INTO t (a, b) VALUES (?...), ...'),
+    ('SELECT last_name::text FROM students WHERE id = :id',
+     'SELECT last_name::text FROM students WHERE id = ?'),
+    ('SELECT CAST(%(p)s AS TEXT)::varchar', 'SELECT CAST(? AS TEXT)::varchar'),
+])
+def test_normalize(statement, expected):
+    assert normalize(statement) == expected
@@ -0,0 +1,97 @@
+"""Tests for lib/listing.py keyset pagination, sync and async"""
+
+import asyncio
+import subprocess
+import sys
+import textwrap
+
+import pytest
+from sqlalchemy.orm import Session
+
+from lib.db import get_async_db, dispose_async_engine
+from lib.student import Student
+from lib import listing
+
+
+@pytest.fixture
+def names(engine):
+    names = [('Smith', 'Ann'), ('Smith', 'Bob'), ('Smythe', 'Cal'), ('Jones', 'Dee'), ('Smith', 'Ann')]
+    with Session(engine) as session:
+        session.add_all(Student(last_name=last, first_name=first, email=f'{i}@example.com')
+                        for i, (last, first) in enumerate(names))
+        session.commit()
+    return sorted(names)
+
+
+def _page_through(fetch_page):
+    seen, after = [], None
+    while True:
+        page = fetch_page(after)
+        seen.extend((item['last_name'], item['first_name']) for item in page.items)
+        if page.next_cursor is None:
+            return seen
+        after = page.next_cursor
+
+
+def test_pages_cover_every_row_once_in_order(engine, names):
+    with Session(engine) as session:
+        seen = _page_through(lambda after: listing.fetch(
+            session, listing.list_students(after=after, limit=2)))
+    assert seen == names
+
+
+def test_search_by_prefix(engine, names):
+    with Session(engine) as session:
+        page = listing.fetch(session, listing.list_students(search='Smi'))
+    assert [item['last_name'] for item in page.items] == ['Smith'] * 3
+
+
+def test_async_session_pages_through_students(engine, names, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', engine.url.render_as_string())
+
+    async def page_through():
+        try:
+            async for db in get_async_db():
+                seen, after = [], None
+                while True:
+                    page = await listing.fetch_async(db, listing.list_students(after=after, limit=2))
+                    seen.extend((item['last_name'], item['first_name']) for item in page.items)
+                    if page.next_cursor is None:
+                        return seen
+                    after = page.next_cursor
+        finally:
+            await dispose_async_engine()
+
+    assert asyncio.run(page_through()) == names
+
+
+def test_script_using_get_async_db_exits(engine, names, monkeypatch):
+    # aiosqlite's worker threads keep the interpreter alive until the engine is disposed
+    monkeypatch.setenv('DATABASE_URL', engine.url.render_as_string())
+    script = textwrap.dedent('''
+        import asyncio
+        from lib.db import get_async_db, dispose_async_engine
+        from lib import listing
+
+        async def main():
+            async for db in get_async_db():
+                page = await listing.fetch_async(db, listing.list_students())
+                print(len(page.items))
+            await dispose_async_engine()
+
+        asyncio.run(main())
+    ''')
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == str(len(names))
+
+
+@pytest.mark.parametrize('cursor', [
+    listing.encode_cursor([1]),
+    listing.encode_cursor('xyz'),
+    listing.encode_cursor({'id': 1}),
+    'not-base64!',
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        listing.list_students(after=cursor)
@@ -0,0 +1,15 @@
+"""Small concurrent runs of lib/loadtest.py; every invariant must hold"""
+
+import pytest
+
+from lib import loadtest, registration
+
+
+@pytest.mark.parametrize('batch_size', [0, 10])
+def test_load_test_invariants_hold(batch_size):
+    report = loadtest.run(threads=8, students=200, courses=3, capacity=20,
+                          batch_size=batch_size, drop_ratio=0.2)
+
+    assert report['errors'] == []
+    assert report['drops'] == 80
+    assert report['outcomes'][registration.ENROLLED] >= 60
@@ -0,0 +1,58 @@
+"""Query plan regression tests: the core queries must stay index-backed"""
+
+from sqlalchemy import text
+
+from lib import explain
+
+
+def test_core_queries_use_indexes(engine):
+    assert explain.check_plans(engine) == {}
+
+
+def test_missing_index_is_reported(engine):
+    with engine.begin() as conn:
+        conn.execute(text('DROP INDEX ix_enrollments_course_id_id'))
+    assert explain.check_plans(engine)['course_roster'] == ['enrollments']
+
+
+LEADING = {
+    'enrollments_pkey': 'id',
+    'unique_student_course': 'student_id',
+    'ix_enrollments_course_id_id': 'course_id',
+}
+
+
+def _index_scan(index, cond=None, node_type='Index Scan'):
+    node = {'Node Type': node_type, 'Relation Name': 'enrollments', 'Index Name': index}
+    if cond is not None:
+        node['Index Cond'] = cond
+    return node
+
+
+def test_postgresql_bounded_index_scan_is_not_a_full_scan():
+    plan = _index_scan('ix_enrollments_course_id_id', '((course_id = 1) AND (id > 1))')
+    assert explain._postgresql_full_scans(plan, LEADING) == []
+
+
+def test_postgresql_primary_key_walk_with_filter_is_a_full_scan():
+    plan = _index_scan('enrollments_pkey')
+    plan['Filter'] = '(course_id = 1)'
+    assert explain._postgresql_full_scans(plan, LEADING) == ['enrollments']
+
+
+def test_postgresql_condition_on_a_non_leading_column_is_a_full_scan():
+    plan = _index_scan('unique_student_course', '(course_id = 1)', 'Index Only Scan')
+    assert explain._postgresql_full_scans(plan, LEADING) == ['enrollments']
+
+
+def test_postgresql_bitmap_index_scan_takes_its_table_from_the_heap_scan():
+    plan = {'Node Type': 'Bitmap Heap Scan', 'Relation Name': 'enrollments',
+            'Plans': [{'Node Type': 'Bitmap Index Scan', 'Index Name': 'unique_student_course',
+                       'Index Cond': '(course_id = 1)'}]}
+    assert explain._postgresql_full_scans(plan, LEADING) == ['enrollments']
+
+
+def test_sqlite_index_walk_is_a_full_scan():
+    details = ['SCAN enrollments USING INDEX unique_student_course',
+               'SEARCH students USING INTEGER PRIMARY KEY (rowid=?)']
+    assert explain._sqlite_full_scans(details) == ['enrollments']
@@ -0,0 +1,96 @@
+"""Tests for lib/registration.py seat counting"""
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from lib.student import Student
+from lib.course import Course
+from lib.enrolment import Enrollment
+from lib import registration
+
+
+@pytest.fixture
+def ids(engine):
+    with Session(engine) as session:
+        students = [Student(first_name='S', last_name=str(i), email=f's{i}@example.com')
+                    for i in range(20)]
+        courses = [Course(code='CS101', name='Intro', credits=4),
+                   Course(code='CS102', name='Data', credits=3)]
+        session.add_all(students + courses)
+        session.commit()
+        return [s.id for s in students], [c.id for c in courses]
+
+
+def _seats(engine):
+    with Session(engine) as session:
+        return dict(session.execute(select(Course.id, Course.seats_taken)).tuples().all())
+
+
+def _assert_matches_recount(engine):
+    incremental = _seats(engine)
+    registration.sync_seat_counts(engine)
+    assert incremental == _seats(engine)
+
+
+def test_flush_updates_seat_counts_in_one_statement(engine, ids):
+    student_ids, (cs101, _cs102) = ids
+    statements = []
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with Session(engine) as session:
+        session.add_all(Enrollment(student_id=sid, course_id=cs101) for sid in student_ids)
+        session.commit()
+    event.remove(engine, 'before_cursor_execute', _count)
+
+    assert sum(s.startswith('UPDATE courses') for s in statements) == 1
+    assert _seats(engine)[cs101] == len(student_ids)
+    _assert_matches_recount(engine)
+
+
+def test_orm_moves_and_deletes_keep_seat_counts(engine, ids):
+    student_ids, (cs101, cs102) = ids
+    with Session(engine) as session:
+        session.add_all(Enrollment(student_id=sid, course_id=cs101) for sid in student_ids)
+        session.add(Enrollment(student_id=student_ids[0], course_id=cs102))
+        session.commit()
+
+        enrollments = session.scalars(select(Enrollment).where(Enrollment.course_id == cs101)).all()
+        enrollments[1].course_id = cs102
+        session.delete(enrollments[2])
+        session.delete(session.get(Student, student_ids[0]))
+        session.commit()
+    _assert_matches_recount(engine)
+
+    with Session(engine) as session:
+        session.delete(session.get(Course, cs102))
+        session.commit()
+    _assert_matches_recount(engine)
+
+
+def test_failed_flush_discards_recorded_seat_changes(engine, ids):
+    student_ids, (cs101, _cs102) = ids
+    with Session(engine) as session:
+        session.add(Enrollment(student_id=student_ids[0], course_id=cs101))
+        session.add(Enrollment(student_id=student_ids[0], course_id=cs101))
+        with pytest.raises(Exception):
+            session.commit()
+        session.rollback()
+
+        session.add(Enrollment(student_id=student_ids[1], course_id=cs101))
+        session.commit()
+    assert _seats(engine)[cs101] == 1
+    _assert_matches_recount(engine)
+
+
+@pytest.mark.parametrize('waitlist', [False, True])
+def test_enroll_in_missing_course_raises(engine, ids, waitlist):
+    student_ids, _courses = ids
+    with Session(engine) as session:
+        with pytest.raises(ValueError, match='Course 999 not found'):
+            registration.enroll(session, student_ids[0], 999, waitlist=waitlist)
+        with pytest.raises(ValueError, match='Course 999 not found'):
+            registration.enroll_many(session, 999, student_ids[:2], waitlist=waitlist)
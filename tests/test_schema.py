@@ -0,0 +1,32 @@
+"""Tests for lib/schema.py upgrade checks"""
+
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from lib import schema
+from lib.student import Student
+from lib.course import Course
+
+
+class _InformationSchema:
+    """Stands in for a PostgreSQL connection answering the information_schema query"""
+
+    def __init__(self, collations):
+        self.dialect = postgresql.dialect()
+        self.collations = collations
+
+    def execute(self, _stmt):
+        return [SimpleNamespace(table_name=table.name, column_name=column.name,
+                                collation_name=self.collations.get(column))
+                for table in schema.Base.metadata.sorted_tables for column in table.columns]
+
+
+def test_default_collation_columns_need_c_collation():
+    mismatched = schema.mismatched_collations(_InformationSchema({}))
+    assert set(mismatched) == {Student.__table__.c.last_name, Course.__table__.c.code}
+
+
+def test_c_collation_columns_are_left_alone():
+    conn = _InformationSchema({Student.__table__.c.last_name: 'C', Course.__table__.c.code: 'C'})
+    assert schema.mismatched_collations(conn) == []